@@ -0,0 +1,88 @@
+"""
+Micro-benchmark for translation request packing
+
+Compares the old paragraph-only greedy chunking with chunker.pack() over the
+saved raw chapters and reports requests per chapter and chunk fill ratio
+(share of the 5000 character service limit a request uses).
+
+Usage (from the crawler directory):
+    python benchmarks/bench_chunker.py [glob]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chunker
+from fixtures import load_chapters
+
+
+DEFAULT_GLOB = os.path.join('novels', '*', 'chapters_raw', '*.html')
+
+# Hard request limit of the translation service
+SERVICE_LIMIT = 5000
+
+
+def legacy_pack(text, max_length=4500):
+    """Chunking used before chunker.py: split on paragraphs, joiner not counted"""
+    chunks = []
+    current_chunk = []
+    current_length = 0
+    for para in text.split('\n\n'):
+        if current_length + len(para) > max_length and current_chunk:
+            chunks.append('\n\n'.join(current_chunk))
+            current_chunk = [para]
+            current_length = len(para)
+        else:
+            current_chunk.append(para)
+            current_length += len(para)
+    if current_chunk:
+        chunks.append('\n\n'.join(current_chunk))
+    return chunks
+
+
+def new_pack(text):
+    units = [(i, para) for i, para in enumerate(text.split('\n\n'))]
+    return [chunker.JOINER.join(piece for _, _, piece in chunk) for chunk in chunker.pack(units)]
+
+
+def measure(name, pack, texts):
+    start = time.perf_counter()
+    packed = [pack(text) for text in texts]
+    elapsed = time.perf_counter() - start
+
+    requests = [len(chunks) for chunks in packed]
+    sizes = [len(chunk) for chunks in packed for chunk in chunks]
+    over_limit = sum(1 for size in sizes if size > SERVICE_LIMIT)
+    fill = [size / SERVICE_LIMIT for size in sizes]
+
+    print(f"{name}")
+    print(f"  Requests:          {sum(requests)} total, {statistics.mean(requests):.2f} per chapter")
+    print(f"  Fill ratio:        {statistics.mean(fill):.1%} mean, {min(fill):.1%} min")
+    print(f"  Over {SERVICE_LIMIT} chars:   {over_limit} request(s)")
+    print(f"  Packing time:      {elapsed / len(texts) * 1e6:.1f} µs per chapter")
+    return sum(requests)
+
+
+def main():
+    pattern = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_GLOB
+    chapters = list(load_chapters(pattern))
+    if not chapters:
+        print(f"No chapters found for {pattern}")
+        return 1
+
+    # Title + content, the way crawl_novel translates a chapter
+    texts = [f"{title}\n\n{content}" for title, content in chapters]
+    print(f"{len(texts)} chapters, {statistics.mean(len(text) for text in texts):.0f} characters on average\n")
+
+    before = measure("Paragraph greedy (legacy)", legacy_pack, texts)
+    after = measure("chunker.pack", new_pack, texts)
+    print(f"\nRequests saved: {before - after} ({(before - after) / before:.1%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Parse-throughput benchmark for the page parsers
+
+Parses every page of a synthetic mirror site (built from novels/ by
+fixtures.py) - or the pages stored in an http_cache.db - with the full
+BeautifulSoup parsers used before and with the fast paths in parser.py,
+checks that both give identical output and reports pages/second and CPU
+time per page.
+
+Usage (from the crawler directory):
+    python benchmarks/bench_parser.py [--cache http_cache.db] [--repeat 3]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+import parser as page_parser
+import fixtures
+
+
+BASE_URL = 'https://www.xbanxia.cc'
+
+
+def legacy_chapter(page):
+    """parse_chapter_html as it was before the lxml fast path (full soup)"""
+    soup = BeautifulSoup(page, 'lxml')
+
+    title_elem = soup.find('h1', id='nr_title')
+    title = title_elem.get_text(strip=True) if title_elem else ''
+
+    content_elem = soup.find('div', id='nr1')
+    if not content_elem:
+        return None, None
+
+    for tag in content_elem.find_all(['script', 'style']):
+        tag.decompose()
+
+    content = content_elem.get_text(separator='\n', strip=True)
+    lines = [line.strip() for line in content.split('\n') if line.strip()]
+    lines = [line for line in lines if '本站無彈出廣告' not in line]
+    return title, '\n\n'.join(lines)
+
+
+def full_soup(parse):
+    """Run a strained parser with its SoupStrainer disabled (the old full-tree parse)"""
+    def run(content, url):
+        saved = page_parser.NOVEL_PAGE_STRAINER, page_parser.CATEGORY_PAGE_STRAINER
+        page_parser.NOVEL_PAGE_STRAINER = page_parser.CATEGORY_PAGE_STRAINER = None
+        try:
+            return parse(content, url)
+        finally:
+            page_parser.NOVEL_PAGE_STRAINER, page_parser.CATEGORY_PAGE_STRAINER = saved
+    return run
+
+
+PARSERS = {
+    'chapter': (lambda content, url: legacy_chapter(content),
+                lambda content, url: page_parser.parse_chapter_html(content)),
+    'novel': (full_soup(page_parser.parse_novel_html), page_parser.parse_novel_html),
+    'category': (full_soup(page_parser.parse_category_html), page_parser.parse_category_html),
+}
+
+
+def cached_pages(path):
+    """(page_type, url, body) for every page stored in an http_cache.db"""
+    conn = sqlite3.connect(path)
+    try:
+        for page_type, url, body in conn.execute('SELECT page_type, url, body FROM responses'):
+            if page_type in PARSERS:
+                yield page_type, url, zlib.decompress(body)
+    finally:
+        conn.close()
+
+
+def synthetic_pages():
+    """(page_type, url, body) for a mirror site of the saved novels"""
+    for path, (page_type, body) in fixtures.build_site(fixtures.load_novels()).items():
+        if page_type in PARSERS:
+            yield page_type, BASE_URL + path, body
+
+
+def bench(parse, pages, repeat):
+    """Best-of-repeat CPU seconds to parse pages"""
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        for url, body in pages:
+            parse(body, url)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--cache', help='parse the pages stored in this http_cache.db')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    pages = {page_type: [] for page_type in PARSERS}
+    for page_type, url, body in (cached_pages(args.cache) if args.cache else synthetic_pages()):
+        pages[page_type].append((url, body))
+    if not any(pages.values()):
+        print("No pages to parse (save some novels under novels/ or pass --cache)")
+        return 1
+
+    mismatches = 0
+    for page_type, (legacy, fast) in PARSERS.items():
+        if not pages[page_type]:
+            continue
+        for url, body in pages[page_type]:
+            if legacy(body, url) != fast(body, url):
+                mismatches += 1
+                print(f"  MISMATCH: {url}")
+
+        size = sum(len(body) for _, body in pages[page_type]) / len(pages[page_type])
+        before = bench(legacy, pages[page_type], args.repeat)
+        after = bench(fast, pages[page_type], args.repeat)
+        count = len(pages[page_type])
+        print(f"{page_type}: {count} pages, {size / 1024:.1f} KB average")
+        print(f"  Full soup: {before / count * 1000:7.2f} ms/page  {count / before:8.1f} pages/s")
+        print(f"  Fast path: {after / count * 1000:7.2f} ms/page  {count / after:8.1f} pages/s  ({before / after:.1f}x)")
+
+    print(f"\nOutput identical: {'yes' if not mismatches else f'NO ({mismatches} pages differ)'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Offline end-to-end benchmark for NovelCrawler
+
+Serves a mirror of the novels saved under novels/ from a local fixture
+server, translates with a stub client (configurable latency) and uploads to
+an in-memory crawler/v1 WordPress stub, then runs crawl_novel or
+crawl_category end to end in a scratch directory. Reports chapters/sec,
+requests per chapter (source, translator, WordPress) and peak RSS, so
+performance changes can be compared reproducibly without touching
+xbanxia.cc, Google Translate or the production site.
+
+Usage (from the crawler directory):
+    python benchmarks/bench_pipeline.py [--mode category|novel] [--novels 3]
+        [--translator-latency 0.2] [--translator-rate 100] [--source-latency 0.02]
+        [--config '{"fetch_workers": 8}'] [--runs 2] [--json results.json]
+        [--wp-latency 0.05] [--wp-faults '{"500": 0.1}'] [--wp-max-bulk-chapters 20]
+        [--profile profile/]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures
+from fixture_server import FixtureServer
+from stub_translator import StubTranslatorClient
+from wordpress_stub import WordPressStub
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def build_config(args, wordpress_url):
+    config = {
+        'wordpress_url': wordpress_url,
+        'api_key': 'benchmark',
+        'max_chapters_per_run': args.max_chapters,
+        'delay_between_requests': 0,
+        'translate': not args.no_translate,
+        'target_language': 'en',
+        'log_console': args.verbose,
+        # The stub has no rate limit - pace it above anything the pipeline can reach,
+        # so timings measure the pipeline rather than the rate controller
+        'translator_rate': args.translator_rate,
+        'translator_max_rate': args.translator_rate,
+    }
+    if args.profile:
+        config['profile_dir'] = os.path.abspath(args.profile)
+    config.update(json.loads(args.config))
+    return config
+
+
+def run_once(crawler, args, target_url, source, wordpress):
+    """One crawl; returns the measured counters"""
+    source_before = source.total_requests()
+    wordpress_before = wordpress.total_requests()
+    chapters_before = len(wordpress.chapters)
+    translator_before = StubTranslatorClient.requests
+    injected_before = dict(wordpress.injected)
+    uploaded_before = wordpress.bytes_received
+
+    output = None if args.verbose else io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        if args.mode == 'novel':
+            crawler.crawl_novel(target_url)
+        else:
+            crawler.crawl_category(target_url)
+    elapsed = time.perf_counter() - start
+
+    chapters = len(wordpress.chapters) - chapters_before
+    requests = {
+        'source': source.total_requests() - source_before,
+        'translator': StubTranslatorClient.requests - translator_before,
+        'wordpress': wordpress.total_requests() - wordpress_before,
+    }
+    return {
+        'elapsed_seconds': round(elapsed, 3),
+        'chapters_uploaded': chapters,
+        'chapters_per_second': round(chapters / elapsed, 2) if elapsed else 0,
+        'requests': requests,
+        'requests_per_chapter': {
+            name: round(count / chapters, 2) if chapters else None for name, count in requests.items()
+        },
+        'wordpress_faults': {
+            kind: count - injected_before.get(kind, 0) for kind, count in wordpress.injected.items()
+            if count - injected_before.get(kind, 0)
+        },
+        'wordpress_kb_received': round((wordpress.bytes_received - uploaded_before) / 1024, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def print_result(label, result):
+    print(f"{label}")
+    print(f"  Elapsed:              {result['elapsed_seconds']:.2f}s")
+    print(f"  Chapters uploaded:    {result['chapters_uploaded']} ({result['chapters_per_second']:.2f} chapters/s)")
+    for name, count in result['requests'].items():
+        per_chapter = result['requests_per_chapter'][name]
+        per_chapter = f"{per_chapter:.2f}/chapter" if per_chapter is not None else "-"
+        print(f"  {name.capitalize() + ' requests:':<22}{count} ({per_chapter})")
+    print(f"  WordPress upload:     {result['wordpress_kb_received']:.0f} KB on the wire")
+    if result['wordpress_faults']:
+        print(f"  WordPress faults:     {result['wordpress_faults']}")
+    print(f"  Peak RSS:             {result['peak_rss_mb']:.1f} MB")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--mode', choices=['category', 'novel'], default='category')
+    arg_parser.add_argument('--novels', type=int, default=None, help='number of saved novels to serve (default: all)')
+    arg_parser.add_argument('--max-chapters', type=int, default=999, help='max_chapters_per_run')
+    arg_parser.add_argument('--translator-latency', type=float, default=0.2, help='seconds per stub translation request')
+    arg_parser.add_argument('--translator-rate', type=float, default=100, help='translator_rate / translator_max_rate (req/s)')
+    arg_parser.add_argument('--source-latency', type=float, default=0.02, help='seconds per source page request')
+    arg_parser.add_argument('--no-translate', action='store_true')
+    arg_parser.add_argument('--wp-latency', type=float, default=0, help='seconds per WordPress stub response')
+    arg_parser.add_argument('--wp-faults', default='{}', help='JSON fault probabilities, e.g. \'{"429": 0.05, "timeout": 0.01}\'')
+    arg_parser.add_argument('--wp-fault-endpoints', nargs='*', help='endpoints faults apply to, e.g. chapters/bulk')
+    arg_parser.add_argument('--wp-max-body-kb', type=float, help='WordPress stub rejects larger bodies with 413')
+    arg_parser.add_argument('--wp-max-bulk-chapters', type=int, help='WordPress stub rejects larger bulk requests with 413')
+    arg_parser.add_argument('--wp-hang-seconds', type=float, default=5, help='duration of an injected timeout')
+    arg_parser.add_argument('--wp-no-gzip', action='store_true', help='WordPress stub does not accept gzip request bodies')
+    arg_parser.add_argument('--config', default='{}', help='JSON object merged into the crawler config')
+    arg_parser.add_argument('--runs', type=int, default=1, help='crawl again in the same directory (caches, incremental mode)')
+    arg_parser.add_argument('--json', help='write the results to this file')
+    arg_parser.add_argument('--profile', metavar='DIR', help='profile the runs (NovelCrawler.start_profiling) into DIR')
+    arg_parser.add_argument('--keep', action='store_true', help='keep the scratch directory')
+    arg_parser.add_argument('--verbose', action='store_true', help='show crawler output')
+    args = arg_parser.parse_args()
+
+    novels = fixtures.load_novels(limit=args.novels)
+    if not novels:
+        print("No saved novels under novels/ to serve")
+        return 1
+
+    source = FixtureServer(latency={
+        'category': args.source_latency, 'novel': args.source_latency, 'chapter': args.source_latency
+    }).start()
+    for novel in novels:
+        novel['cover_url'] = f"{source.url}/covers/{novel['id']}.jpg" if novel.get('cover') else ''
+    source.site = fixtures.build_site(novels)
+    wordpress = WordPressStub(
+        latency=args.wp_latency, faults=json.loads(args.wp_faults), fault_endpoints=args.wp_fault_endpoints,
+        max_body_bytes=int(args.wp_max_body_kb * 1024) if args.wp_max_body_kb else None,
+        max_bulk_chapters=args.wp_max_bulk_chapters, hang_seconds=args.wp_hang_seconds, seed=0,
+        gzip_requests=not args.wp_no_gzip
+    ).start()
+    StubTranslatorClient.reset()
+
+    if args.mode == 'novel':
+        target_url = f"{source.url}/books/{novels[0]['id']}.html"
+        total_chapters = len(novels[0]['chapters'])
+    else:
+        target_url = f"{source.url}/list/1_1.html"
+        total_chapters = sum(len(novel['chapters']) for novel in novels)
+
+    workdir = tempfile.mkdtemp(prefix='crawler-bench-')
+    original_dir = os.getcwd()
+    results = []
+    metrics = None
+    try:
+        os.chdir(workdir)
+        config = build_config(args, wordpress.url)
+        with open('config.json', 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+
+        from crawler import NovelCrawler
+        with contextlib.redirect_stdout(None if args.verbose else io.StringIO()):
+            crawler = NovelCrawler('config.json', translator_client_factory=StubTranslatorClient.factory(args.translator_latency))
+
+        print(f"{args.mode} crawl: {len(novels)} novel(s), {total_chapters} chapters available, "
+              f"translator latency {args.translator_latency}s, source latency {args.source_latency}s")
+        print(f"Config overrides: {args.config}\n")
+        if args.profile:
+            crawler.start_profiling()
+        for run in range(1, args.runs + 1):
+            result = run_once(crawler, args, target_url, source, wordpress)
+            results.append(result)
+            print_result(f"Run {run}", result)
+        with contextlib.redirect_stdout(None if args.verbose else io.StringIO()):
+            crawler.finish_covers()
+        crawler.stop_profiling()
+
+        metrics = crawler.metrics.snapshot()
+        crawler.file_manager.close()
+        if crawler.page_cache:
+            crawler.page_cache.close()
+        if crawler.translator and crawler.translator.memory:
+            crawler.translator.memory.close()
+    finally:
+        os.chdir(original_dir)
+        source.stop()
+        wordpress.stop()
+        if args.keep:
+            print(f"\nScratch directory: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'mode': args.mode,
+                'novels': len(novels),
+                'chapters_available': total_chapters,
+                'translator_latency': args.translator_latency,
+                'source_latency': args.source_latency,
+                'wordpress_latency': args.wp_latency,
+                'wordpress_faults': json.loads(args.wp_faults),
+                'config': json.loads(args.config),
+                'runs': results,
+                'metrics': metrics,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Local HTTP server for recorded or synthetic source pages
+"""
+
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+CONTENT_TYPES = {
+    'cover': 'image/jpeg',
+}
+
+
+class FixtureServer:
+    """
+    Serves {path: (page_type, body bytes)} (see fixtures.build_site) with ETag
+    revalidation, an optional per-page-type latency and request counters.
+    """
+
+    def __init__(self, site=None, latency=None, host='127.0.0.1', port=0):
+        self.site = site or {}
+        # Seconds to wait before answering, per page type ({'chapter': 0.05, ...})
+        self.latency = latency or {}
+        self.requests = {}      # page_type -> count
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fixture-server', daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def total_requests(self):
+        with self._lock:
+            return sum(self.requests.values())
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                page_type, body = server.site.get(urlparse(self.path).path, ('missing', None))
+                with server._lock:
+                    server.requests[page_type] = server.requests.get(page_type, 0) + 1
+                if server.latency.get(page_type):
+                    time.sleep(server.latency[page_type])
+
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                with server._lock:
+                    server.bytes_sent += len(body)
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPES.get(page_type, 'text/html; charset=utf-8'))
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
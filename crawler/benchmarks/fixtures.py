@@ -0,0 +1,164 @@
+"""
+Synthetic source pages for benchmarks
+
+Pages follow the xbanxia.cc markup the parser reads (book-intro / book-list,
+pop-books2 / pagelink, h1#nr_title / div#nr1) and are filled with the novels
+saved under novels/ (metadata.json + chapters_raw), so parsing and packing
+work on real text without touching the network.
+"""
+
+import glob
+import html
+import json
+import os
+import re
+
+
+NOVELS_DIR = 'novels'
+
+# Page chrome around the parsed sections - sized like the real site
+HEAD = '''<!DOCTYPE html>
+<html lang="zh-Hant"><head><meta charset="utf-8"><title>{title}</title>
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<link rel="stylesheet" href="/static/css/style.css">
+<script>var _hmt = _hmt || [];(function(){{var hm = document.createElement("script");hm.src = "/static/js/stat.js";}})();</script>
+<style>.nav li{{float:left;margin:0 8px}}.footer{{color:#999;text-align:center}}</style>
+</head><body>
+<div class="header"><div class="logo"><a href="/">半夏小說</a></div>
+<ul class="nav">{nav}</ul><form class="search" action="/search.html"><input name="searchkey"><button>搜索</button></form></div>
+'''
+NAV = ''.join(f'<li><a href="/list/{n}_1.html">分類{n}</a></li>' for n in range(1, 13))
+FOOTER = '''<div class="footer"><p>本站所有小說為轉載作品，所有章節均由網友上傳，轉載至本站只是為了宣傳，讓更多讀者欣賞。</p>
+<p>Copyright &copy; 半夏小說 All Rights Reserved.</p></div>
+<script src="/static/js/common.js"></script><script>tj();</script>
+</body></html>'''
+
+
+def load_novels(novels_dir=NOVELS_DIR, limit=None):
+    """
+    Saved novels as dicts: id, title, author, type, status, description,
+    cover_url, cover (image bytes or None) and chapters [(title, content)]
+    in chapter order.
+    """
+    novels = []
+    for novel_dir in sorted(glob.glob(os.path.join(novels_dir, 'novel_*'))):
+        chapters = list(load_chapters(os.path.join(novel_dir, 'chapters_raw', '*.html')))
+        if not chapters:
+            continue
+        cover = None
+        cover_path = os.path.join(novel_dir, 'cover.jpg')
+        if os.path.exists(cover_path):
+            with open(cover_path, 'rb') as f:
+                cover = f.read()
+        metadata = {}
+        metadata_path = os.path.join(novel_dir, 'metadata.json')
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        novels.append({
+            'id': os.path.basename(novel_dir).replace('novel_', ''),
+            'title': metadata.get('title', os.path.basename(novel_dir)),
+            'author': metadata.get('author', ''),
+            'type': metadata.get('type', ''),
+            'status': metadata.get('status', ''),
+            'description': metadata.get('description', '<div class="describe-html"><p></p></div>'),
+            'cover_url': metadata.get('cover_url', ''),
+            'cover': cover,
+            'chapters': chapters,
+        })
+        if limit and len(novels) >= limit:
+            break
+    return novels
+
+
+def load_chapters(pattern):
+    """Yield (title, content) for every saved chapter matching pattern"""
+    for path in sorted(glob.glob(pattern)):
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = f.read()
+        title_match = re.search(r'<h1>(.*?)</h1>', saved, re.DOTALL)
+        content_match = re.search(r'</h1>\s*(.+)', saved, re.DOTALL)
+        yield (title_match.group(1) if title_match else '',
+               content_match.group(1).strip() if content_match else saved)
+
+
+def chapter_page(novel, number):
+    """HTML of chapter `number` (1-based) of novel"""
+    title, content = novel['chapters'][number - 1]
+    lines = '<br />\n'.join(f'&nbsp;&nbsp;&nbsp;&nbsp;{html.escape(line)}' for line in content.split('\n\n'))
+    previous_link = f'/books/{novel["id"]}/{number - 1}.html' if number > 1 else f'/books/{novel["id"]}.html'
+    next_link = f'/books/{novel["id"]}/{number + 1}.html' if number < len(novel['chapters']) else f'/books/{novel["id"]}.html'
+    return (
+        HEAD.format(title=html.escape(f'{title}_{novel["title"]}'), nav=NAV)
+        + f'<div class="main"><div class="crumbs"><a href="/">首頁</a> &gt; <a href="/books/{novel["id"]}.html">{html.escape(novel["title"])}</a></div>'
+        + f'<div class="chapter"><h1 id="nr_title">{html.escape(title)}</h1>'
+        + f'<div class="page-link"><a href="{previous_link}">上一章</a><a href="/books/{novel["id"]}.html">目錄</a><a href="{next_link}">下一章</a></div>'
+        + f'<div id="nr1"><script>read_top();</script>\n{lines}<br />\n本站無彈出廣告，永久域名（xbanxia.cc）<script>read_bottom();</script></div>'
+        + f'<div class="page-link"><a href="{previous_link}">上一章</a><a href="/books/{novel["id"]}.html">目錄</a><a href="{next_link}">下一章</a></div>'
+        + '</div></div>' + FOOTER
+    )
+
+
+def novel_page(novel):
+    """HTML of a novel's table of contents page"""
+    links = ''.join(
+        f'<li><a href="/books/{novel["id"]}/{number}.html" title="{html.escape(title)}">{html.escape(title)}</a></li>'
+        for number, (title, _) in enumerate(novel['chapters'], start=1)
+    )
+    latest_number = len(novel['chapters'])
+    latest_title = novel['chapters'][-1][0]
+    return (
+        HEAD.format(title=html.escape(novel['title']), nav=NAV)
+        + '<div class="main"><div class="book-intro">'
+        + f'<div class="book-img"><img class="lazy" src="/static/img/nocover.jpg" data-original="{html.escape(novel["cover_url"])}"></div>'
+        + f'<div class="book-describe"><h1>{html.escape(novel["title"])}</h1>'
+        + f'<p>作者︰<a href="/author/{html.escape(novel["author"])}">{html.escape(novel["author"])}</a></p>'
+        + f'<p>類型︰{html.escape(novel["type"])}</p><p>狀態︰{html.escape(novel["status"])}</p>'
+        + '<p>最近更新︰2025-11-05 14:20</p>'
+        + f'<p>最新章節︰<a href="/books/{novel["id"]}/{latest_number}.html">{html.escape(latest_title)}</a></p>'
+        + f'{novel["description"]}</div></div>'
+        + f'<div class="book-list"><ul>{links}</ul></div></div>'
+        + FOOTER
+    )
+
+
+def category_page(novels, page=1, total_pages=1, category=1):
+    """HTML of one category listing page showing novels"""
+    items = ''.join(
+        f'<li class="pop-book2"><a href="/books/{novel["id"]}.html" title="{html.escape(novel["title"])}">'
+        f'<img class="lazy" data-original="{html.escape(novel["cover_url"])}"></a>'
+        f'<h2><a href="/books/{novel["id"]}.html">{html.escape(novel["title"])}</a></h2>'
+        f'<p>作者︰{html.escape(novel["author"])}</p>'
+        f'<p>最新︰<a href="/books/{novel["id"]}/{len(novel["chapters"])}.html">{html.escape(novel["chapters"][-1][0])}</a>'
+        f' 2025-11-05</p></li>'
+        for novel in novels
+    )
+    next_link = f'<a class="next" href="/list/{category}_{page + 1}.html">下一頁</a>' if page < total_pages else ''
+    return (
+        HEAD.format(title=f'分類{category}', nav=NAV)
+        + f'<div class="main"><div class="pop-books2"><ul>{items}</ul></div>'
+        + f'<div class="pagelink"><em id="pagestats">{page}/{total_pages}</em>{next_link}</div></div>'
+        + FOOTER
+    )
+
+
+def build_site(novels, per_page=20, category=1):
+    """
+    Every page of a small mirror site as {path: (page_type, body bytes)}:
+    /list/<category>_<page>.html, /books/<id>.html, /books/<id>/<n>.html
+    and /covers/<id>.jpg for novels with a saved cover
+    """
+    site = {}
+    total_pages = max(1, (len(novels) + per_page - 1) // per_page)
+    for page in range(1, total_pages + 1):
+        listed = novels[(page - 1) * per_page:page * per_page]
+        site[f'/list/{category}_{page}.html'] = (
+            'category', category_page(listed, page, total_pages, category).encode('utf-8')
+        )
+    for novel in novels:
+        site[f'/books/{novel["id"]}.html'] = ('novel', novel_page(novel).encode('utf-8'))
+        if novel.get('cover'):
+            site[f'/covers/{novel["id"]}.jpg'] = ('cover', novel['cover'])
+        for number in range(1, len(novel['chapters']) + 1):
+            site[f'/books/{novel["id"]}/{number}.html'] = ('chapter', chapter_page(novel, number).encode('utf-8'))
+    return site
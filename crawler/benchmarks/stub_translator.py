@@ -0,0 +1,50 @@
+"""
+Offline stand-in for the googletrans client
+"""
+
+import re
+import threading
+import time
+
+
+CJK_PATTERN = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+
+
+class StubResult:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubTranslatorClient:
+    """
+    Drop-in for googletrans.Translator: translate(text, src, dest) sleeps for
+    `latency` seconds and returns a latin placeholder with the same paragraph
+    layout. Counters are shared by every instance (Translator creates one
+    client per thread), use StubTranslatorClient.reset() between runs.
+    """
+
+    requests = 0
+    characters = 0
+    _lock = threading.Lock()
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls.requests = 0
+            cls.characters = 0
+
+    @classmethod
+    def factory(cls, latency=0.2):
+        """client_factory for Translator / NovelCrawler"""
+        return lambda: cls(latency)
+
+    def translate(self, text, src='auto', dest='en'):
+        with StubTranslatorClient._lock:
+            StubTranslatorClient.requests += 1
+            StubTranslatorClient.characters += len(text)
+        if self.latency:
+            time.sleep(self.latency)
+        return StubResult(CJK_PATTERN.sub('w', text))
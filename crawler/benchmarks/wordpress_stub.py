@@ -0,0 +1,337 @@
+"""
+In-memory stand-in for the crawler/v1 WordPress REST API
+
+Implements the endpoints WordPressAPI talks to:
+    GET  /wp-json/crawler/v1/health
+    POST /wp-json/crawler/v1/story
+    GET  /wp-json/crawler/v1/story/<id>/chapters
+    GET  /wp-json/crawler/v1/chapter/exists
+    POST /wp-json/crawler/v1/chapter
+    POST /wp-json/crawler/v1/chapters/bulk
+Stories are matched by source url, chapters by (story_id, chapter_number).
+
+Latency, payload-size limits and injected failures (429 with Retry-After,
+5xx, timeouts) make it usable for tuning batch sizes, retries and
+concurrency without the production site. Run standalone with:
+    python benchmarks/wordpress_stub.py --port 8080 --latency 0.05 --faults '{"429": 0.05}'
+"""
+
+import argparse
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+API_PREFIX = '/wp-json/crawler/v1/'
+
+
+class WordPressStub:
+    """
+    Local crawler/v1 server with in-memory storage.
+
+        stub = WordPressStub().start()
+        crawler config: "wordpress_url": stub.url
+        ...
+        stub.stop()
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, api_key=None, latency=0, jitter=0,
+                 max_body_bytes=None, max_bulk_chapters=None, faults=None, fault_endpoints=None,
+                 hang_seconds=35, seed=None, gzip_requests=True):
+        """
+        latency: seconds added to every response (a number, or {endpoint: seconds})
+        jitter: extra random seconds (0..jitter) per response
+        max_body_bytes: larger request bodies get 413 (decompressed size)
+        max_bulk_chapters: larger chapters/bulk requests get 413
+        faults: {'429': p, '500': p, '502': p, '503': p, 'timeout': p} failure probabilities
+        fault_endpoints: endpoints faults apply to (default: all), e.g. ['chapters/bulk']
+        hang_seconds: how long a 'timeout' fault holds the request before dropping it
+        gzip_requests: advertise and accept gzip request bodies (False answers them with 415)
+        """
+        self.api_key = api_key
+        self.latency = latency
+        self.jitter = jitter
+        self.max_body_bytes = max_body_bytes
+        self.max_bulk_chapters = max_bulk_chapters
+        self.faults = {str(kind): probability for kind, probability in (faults or {}).items()}
+        self.fault_endpoints = set(fault_endpoints) if fault_endpoints else None
+        self.hang_seconds = hang_seconds
+        self.gzip_requests = gzip_requests
+        self.stories = {}       # story_id -> story dict
+        self.story_ids = {}     # source url -> story_id
+        self.chapters = {}      # (story_id, chapter_number) -> chapter dict
+        self.requests = {}      # endpoint -> count
+        self.injected = {}      # fault kind -> count
+        self.bytes_received = 0
+        self._next_id = 1
+        self._scripted = []     # [endpoint or None, fault kind, remaining count]
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='wordpress-stub', daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def chapter_numbers(self, story_id):
+        """Sorted chapter numbers stored for a story"""
+        with self._lock:
+            return sorted(number for sid, number in self.chapters if sid == story_id)
+
+    def total_requests(self):
+        with self._lock:
+            return sum(self.requests.values())
+
+    def fail_next(self, kind, count=1, endpoint=None):
+        """Force the next count requests (to endpoint, or any) to fail with kind ('429', '500', 'timeout', ...)"""
+        with self._lock:
+            self._scripted.append([endpoint, str(kind), count])
+
+    def _pick_fault(self, endpoint):
+        """Fault to inject for this request, or None"""
+        with self._lock:
+            for scripted in self._scripted:
+                if scripted[0] in (None, endpoint):
+                    scripted[2] -= 1
+                    if scripted[2] <= 0:
+                        self._scripted.remove(scripted)
+                    return scripted[1]
+            if self.fault_endpoints is not None and endpoint not in self.fault_endpoints:
+                return None
+            roll = self._random.random()
+            for kind, probability in self.faults.items():
+                if roll < probability:
+                    return kind
+                roll -= probability
+        return None
+
+    def _delay(self, endpoint):
+        latency = self.latency.get(endpoint, 0) if isinstance(self.latency, dict) else self.latency
+        if self.jitter:
+            with self._lock:
+                latency += self._random.uniform(0, self.jitter)
+        if latency:
+            time.sleep(latency)
+
+    # Endpoint implementations - return (status, body dict)
+
+    def health(self, query, body):
+        return 200, {'status': 'ok', 'wordpress': 'stub', 'crawler_api': 'v1',
+                     'capabilities': {'gzip_requests': self.gzip_requests}}
+
+    def story(self, query, body):
+        with self._lock:
+            story_id = self.story_ids.get(body.get('url'))
+            if story_id is not None:
+                self.stories[story_id].update(body)
+                return 200, {'story_id': story_id, 'existed': True}
+            story_id = self._new_id()
+            self.story_ids[body.get('url')] = story_id
+            self.stories[story_id] = dict(body)
+            return 201, {'story_id': story_id, 'existed': False}
+
+    def story_chapters(self, query, body, story_id):
+        total = int(query.get('total_chapters', ['0'])[0] or 0)
+        existing = self.chapter_numbers(story_id)
+        return 200, {
+            'chapters_count': len(existing),
+            'is_complete': bool(total) and len(existing) >= total,
+            'existing_chapters': existing,
+        }
+
+    def chapter_exists(self, query, body):
+        key = (int(query.get('story_id', ['0'])[0]), int(query.get('chapter_number', ['0'])[0]))
+        with self._lock:
+            chapter = self.chapters.get(key)
+        return 200, {'exists': chapter is not None, 'chapter_id': chapter['id'] if chapter else None}
+
+    def chapter(self, query, body):
+        chapter_id, existed = self._store_chapter(body)
+        return (200 if existed else 201), {'chapter_id': chapter_id, 'existed': existed}
+
+    def chapters_bulk(self, query, body):
+        results = []
+        counts = {'created': 0, 'existed': 0, 'failed': 0}
+        for chapter in body.get('chapters', []):
+            try:
+                chapter_id, existed = self._store_chapter(chapter)
+            except (KeyError, TypeError, ValueError) as e:
+                counts['failed'] += 1
+                results.append({'chapter_number': chapter.get('chapter_number'), 'status': 'failed', 'error': str(e)})
+                continue
+            status = 'existed' if existed else 'created'
+            counts[status] += 1
+            results.append({'chapter_number': chapter['chapter_number'], 'status': status, 'chapter_id': chapter_id})
+        return 200, {**counts, 'results': results}
+
+    def _store_chapter(self, chapter):
+        key = (int(chapter['story_id']), int(chapter['chapter_number']))
+        with self._lock:
+            if key in self.chapters:
+                return self.chapters[key]['id'], True
+            chapter_id = self._new_id()
+            self.chapters[key] = {'id': chapter_id, **chapter}
+            return chapter_id, False
+
+    def _new_id(self):
+        chapter_id = self._next_id
+        self._next_id += 1
+        return chapter_id
+
+    def route(self, method, path):
+        """Endpoint handler for a request, or None"""
+        endpoint = path[len(API_PREFIX):] if path.startswith(API_PREFIX) else None
+        if endpoint is None:
+            return None, None
+        routes = {
+            ('GET', 'health'): self.health,
+            ('POST', 'story'): self.story,
+            ('GET', 'chapter/exists'): self.chapter_exists,
+            ('POST', 'chapter'): self.chapter,
+            ('POST', 'chapters/bulk'): self.chapters_bulk,
+        }
+        if (method, endpoint) in routes:
+            return endpoint, routes[(method, endpoint)]
+        match = re.fullmatch(r'story/(\d+)/chapters', endpoint)
+        if method == 'GET' and match:
+            story_id = int(match.group(1))
+            return 'story/<id>/chapters', lambda query, body: self.story_chapters(query, body, story_id)
+        return endpoint, None
+
+    def handle(self, request, method):
+        """Serve one request (runs on a server thread)"""
+        parsed = urlparse(request.path)
+        endpoint, handler = self.route(method, parsed.path)
+
+        raw = b''
+        if method == 'POST':
+            raw = request.rfile.read(int(request.headers.get('Content-Length') or 0))
+        with self._lock:
+            self.requests[endpoint or parsed.path] = self.requests.get(endpoint or parsed.path, 0) + 1
+            self.bytes_received += len(raw)
+
+        if handler is None:
+            return request.send_json(404, {'code': 'rest_no_route', 'message': 'No route was found'})
+        if self.api_key and request.headers.get('X-API-Key') != self.api_key:
+            return request.send_json(401, {'code': 'rest_forbidden', 'message': 'Invalid API key'})
+
+        self._delay(endpoint)
+        fault = self._pick_fault(endpoint)
+        if fault is not None:
+            with self._lock:
+                self.injected[fault] = self.injected.get(fault, 0) + 1
+            if fault == 'timeout':
+                # Hold the request, then drop the connection without a response
+                time.sleep(self.hang_seconds)
+                request.close_connection = True
+                return
+            status = int(fault)
+            headers = {'Retry-After': '1'} if status == 429 else None
+            return request.send_json(status, {'code': 'injected_fault', 'message': f'Injected {status}'}, headers)
+
+        body = {}
+        if raw:
+            if request.headers.get('Content-Encoding') == 'gzip':
+                if not self.gzip_requests:
+                    return request.send_json(415, {'code': 'rest_unsupported_encoding',
+                                                   'message': 'Content-Encoding gzip is not supported'})
+                raw = gzip.decompress(raw)
+            if self.max_body_bytes and len(raw) > self.max_body_bytes:
+                return request.send_json(413, {'code': 'rest_payload_too_large',
+                                               'message': f'Body of {len(raw)} bytes exceeds {self.max_body_bytes}'})
+            try:
+                body = json.loads(raw)
+            except ValueError:
+                return request.send_json(400, {'code': 'rest_invalid_json', 'message': 'Invalid JSON body'})
+
+        if (endpoint == 'chapters/bulk' and self.max_bulk_chapters
+                and len(body.get('chapters', [])) > self.max_bulk_chapters):
+            return request.send_json(413, {'code': 'rest_payload_too_large',
+                                           'message': f'More than {self.max_bulk_chapters} chapters'})
+
+        status, payload = handler(parse_qs(parsed.query), body)
+        request.send_json(status, payload)
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                stub.handle(self, 'GET')
+
+            def do_POST(self):
+                stub.handle(self, 'POST')
+
+        return Handler
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Local crawler/v1 WordPress API stand-in')
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8080)
+    arg_parser.add_argument('--api-key', help='require this X-API-Key')
+    arg_parser.add_argument('--latency', type=float, default=0, help='seconds added to every response')
+    arg_parser.add_argument('--jitter', type=float, default=0, help='extra random seconds per response')
+    arg_parser.add_argument('--max-body-kb', type=float, help='reject larger request bodies with 413')
+    arg_parser.add_argument('--max-bulk-chapters', type=int, help='reject larger bulk requests with 413')
+    arg_parser.add_argument('--faults', default='{}', help='JSON, e.g. \'{"429": 0.05, "500": 0.01, "timeout": 0.01}\'')
+    arg_parser.add_argument('--fault-endpoints', nargs='*', help='endpoints faults apply to, e.g. chapters/bulk')
+    arg_parser.add_argument('--hang-seconds', type=float, default=35, help='duration of a timeout fault')
+    arg_parser.add_argument('--seed', type=int)
+    arg_parser.add_argument('--no-gzip', action='store_true', help='do not accept gzip request bodies')
+    args = arg_parser.parse_args()
+
+    stub = WordPressStub(
+        args.host, args.port, api_key=args.api_key, latency=args.latency, jitter=args.jitter,
+        max_body_bytes=int(args.max_body_kb * 1024) if args.max_body_kb else None,
+        max_bulk_chapters=args.max_bulk_chapters, faults=json.loads(args.faults),
+        fault_endpoints=args.fault_endpoints, hang_seconds=args.hang_seconds, seed=args.seed,
+        gzip_requests=not args.no_gzip
+    ).start()
+    print(f"crawler/v1 stub listening on {stub.url} (set \"wordpress_url\": \"{stub.url}\")")
+    print("Press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+        print(f"\nRequests: {stub.requests}")
+        print(f"Injected faults: {stub.injected}")
+        print(f"Stories: {len(stub.stories)}, chapters: {len(stub.chapters)}, bytes received: {stub.bytes_received}")
+
+
+if __name__ == '__main__':
+    main()
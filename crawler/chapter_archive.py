@@ -0,0 +1,181 @@
+"""
+Packed per-novel chapter archive (chapter_storage: "archive")
+
+Instead of one HTML file per chapter and language, every chapter of a novel
+is appended to novels/novel_<id>/chapters.pack, each entry zlib-compressed
+on its own. chapters.idx holds one fixed-size record per entry (chapter,
+kind, offset, lengths), so any chapter is read straight out of an mmap of
+the pack. export() writes the usual chapters_raw/ + chapters_translated/
+file layout back out.
+
+Usage:
+    python chapter_archive.py export novels/novel_396941 [output_dir]
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+
+
+PACK_NAME = 'chapters.pack'
+INDEX_NAME = 'chapters.idx'
+KINDS = ('raw', 'translated')
+
+# chapter number, kind (index into KINDS), offset, compressed length, uncompressed length
+INDEX_RECORD = struct.Struct('<IBQII')
+
+
+def chapter_filename(novel_name, chapter_number):
+    """File layout name: NovelName_Chapter_001.html"""
+    safe_novel_name = novel_name.replace(' ', '_').replace('/', '_').replace('\\', '_')[:50]
+    return f"{safe_novel_name}_Chapter_{chapter_number:03d}.html"
+
+
+class ChapterArchive:
+    """
+    Append-only: re-saving a chapter appends a new entry and the index keeps
+    the latest one. The pack is written before its index record, so after a
+    crash index records pointing past the end of the pack (or torn records)
+    are dropped on open and those chapters are simply saved again.
+    """
+
+    def __init__(self, novel_dir, level=6):
+        self.novel_dir = novel_dir
+        self.pack_path = os.path.join(novel_dir, PACK_NAME)
+        self.index_path = os.path.join(novel_dir, INDEX_NAME)
+        self.level = level
+        self.index = {}  # (chapter_number, kind) -> (offset, length, size)
+        self._lock = threading.Lock()
+        self._pack = None
+        self._index_file = None
+        self._map = None
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        pack_size = os.path.getsize(self.pack_path) if os.path.exists(self.pack_path) else 0
+        with open(self.index_path, 'rb') as f:
+            data = f.read()
+        valid_end = 0
+        for position in range(0, len(data) - INDEX_RECORD.size + 1, INDEX_RECORD.size):
+            chapter_number, kind, offset, length, size = INDEX_RECORD.unpack_from(data, position)
+            if kind >= len(KINDS) or offset + length > pack_size:
+                break
+            self.index[(chapter_number, KINDS[kind])] = (offset, length, size)
+            valid_end = position + INDEX_RECORD.size
+        if valid_end != len(data):
+            with open(self.index_path, 'r+b') as f:
+                f.truncate(valid_end)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def put(self, chapter_number, kind, text):
+        """Append one chapter ('raw' or 'translated'); returns the compressed size"""
+        data = text.encode('utf-8')
+        compressed = zlib.compress(data, self.level)
+        with self._lock:
+            if self._pack is None:
+                os.makedirs(self.novel_dir, exist_ok=True)
+                self._pack = open(self.pack_path, 'ab')
+                self._index_file = open(self.index_path, 'ab')
+            offset = self._pack.seek(0, os.SEEK_END)
+            self._pack.write(compressed)
+            self._pack.flush()
+            self._index_file.write(INDEX_RECORD.pack(chapter_number, KINDS.index(kind), offset, len(compressed), len(data)))
+            self._index_file.flush()
+            self.index[(chapter_number, kind)] = (offset, len(compressed), len(data))
+        return len(compressed)
+
+    def get(self, chapter_number, kind):
+        """Uncompressed bytes of a chapter, or None if it is not in the archive or its entry is corrupt"""
+        with self._lock:
+            entry = self.index.get((chapter_number, kind))
+            if entry is None:
+                return None
+            offset, length, size = entry
+            if self._map is None or offset + length > len(self._map):
+                self._remap()
+            compressed = self._map[offset:offset + length]
+        try:
+            data = zlib.decompress(compressed)
+        except zlib.error:
+            return None
+        return data if len(data) == size else None
+
+    def _remap(self):
+        """(Re)map the pack after it grew"""
+        if self._map is not None:
+            self._map.close()
+        with open(self.pack_path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def stats(self):
+        """Entries and bytes: live (latest entry per chapter) vs. the whole pack"""
+        with self._lock:
+            live_bytes = sum(length for _, length, _ in self.index.values())
+            raw_bytes = sum(size for _, _, size in self.index.values())
+        pack_bytes = os.path.getsize(self.pack_path) if os.path.exists(self.pack_path) else 0
+        return {'entries': len(self.index), 'pack_bytes': pack_bytes, 'live_bytes': live_bytes, 'raw_bytes': raw_bytes}
+
+    def export(self, output_dir, novel_name_raw='', novel_name_translated=''):
+        """
+        Write every chapter as chapters_raw/ and chapters_translated/ HTML files.
+        Corrupt entries are skipped (no file is written for them).
+        Returns (files written, [(chapter_number, kind) skipped])
+        """
+        names = {'raw': novel_name_raw, 'translated': novel_name_translated}
+        written = 0
+        skipped = []
+        for chapter_number, kind in sorted(self.index):
+            data = self.get(chapter_number, kind)
+            if data is None:
+                skipped.append((chapter_number, kind))
+                continue
+            chapters_dir = os.path.join(output_dir, f'chapters_{kind}')
+            os.makedirs(chapters_dir, exist_ok=True)
+            with open(os.path.join(chapters_dir, chapter_filename(names[kind], chapter_number)), 'wb') as f:
+                f.write(data)
+            written += 1
+        return written, skipped
+
+    def close(self):
+        with self._lock:
+            for handle in (self._pack, self._index_file, self._map):
+                if handle is not None:
+                    handle.close()
+            self._pack = self._index_file = self._map = None
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != 'export':
+        print("Usage: python chapter_archive.py export <novel_dir> [output_dir]")
+        sys.exit(1)
+    novel_dir = sys.argv[2]
+    output_dir = sys.argv[3] if len(sys.argv) > 3 else novel_dir
+    metadata = {}
+    metadata_path = os.path.join(novel_dir, 'metadata.json')
+    if os.path.exists(metadata_path):
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    archive = ChapterArchive(novel_dir)
+    written, skipped = archive.export(
+        output_dir,
+        novel_name_raw=metadata.get('title', ''),
+        novel_name_translated=metadata.get('title_translated') or metadata.get('title', '')
+    )
+    archive.close()
+    print(f"Exported {written} chapter files to {output_dir}")
+    if skipped:
+        print(f"Skipped {len(skipped)} corrupt entries: "
+              + ', '.join(f"chapter {chapter_number} ({kind})" for chapter_number, kind in skipped))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Compact chapter-number sets for the local chapter-existence index
+"""
+
+from bisect import bisect_right
+
+
+class ChapterRanges:
+    """
+    Set of chapter numbers stored as sorted, non-overlapping inclusive ranges:
+    chapters 1-2000 plus 2005 are [[1, 2000], [2005, 2005]], so a novel with
+    thousands of uploaded chapters costs a few bytes in the state store.
+    """
+
+    def __init__(self, ranges=None):
+        self.ranges = []
+        for start, end in ranges or []:
+            self.add_range(int(start), int(end))
+
+    @classmethod
+    def from_numbers(cls, numbers):
+        index = cls()
+        index.add_many(numbers)
+        return index
+
+    def to_list(self):
+        """JSON-serializable [[start, end], ...]"""
+        return [list(chapter_range) for chapter_range in self.ranges]
+
+    def __contains__(self, number):
+        position = bisect_right(self.ranges, [number, float('inf')]) - 1
+        return position >= 0 and self.ranges[position][0] <= number <= self.ranges[position][1]
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in self.ranges)
+
+    def __iter__(self):
+        for start, end in self.ranges:
+            yield from range(start, end + 1)
+
+    def __bool__(self):
+        return bool(self.ranges)
+
+    def covers(self, start, end):
+        """True if every chapter from start to end (inclusive) is present"""
+        if end < start:
+            return True
+        position = bisect_right(self.ranges, [start, float('inf')]) - 1
+        return position >= 0 and self.ranges[position][0] <= start and self.ranges[position][1] >= end
+
+    def add(self, number):
+        self.add_range(number, number)
+
+    def add_many(self, numbers):
+        """Add chapter numbers (any order); consecutive runs are added as one range"""
+        run_start = run_end = None
+        for number in sorted(set(int(number) for number in numbers)):
+            if run_end is not None and number == run_end + 1:
+                run_end = number
+                continue
+            if run_start is not None:
+                self.add_range(run_start, run_end)
+            run_start = run_end = number
+        if run_start is not None:
+            self.add_range(run_start, run_end)
+
+    def add_range(self, start, end):
+        """Add start..end (inclusive), merging with overlapping or adjacent ranges"""
+        if end < start:
+            return
+        ranges = self.ranges
+        # First range that could touch [start, end] (ends at start - 1 or later)
+        low = bisect_right(ranges, [start, float('inf')]) - 1
+        if low < 0 or ranges[low][1] < start - 1:
+            low += 1
+        high = low
+        while high < len(ranges) and ranges[high][0] <= end + 1:
+            start = min(start, ranges[high][0])
+            end = max(end, ranges[high][1])
+            high += 1
+        ranges[low:high] = [[start, end]]
+
+    def __repr__(self):
+        return f"ChapterRanges({self.to_list()})"
@@ -0,0 +1,176 @@
+"""
+Per-novel chapter manifest (novels/novel_<id>/manifest.json)
+
+Maps each chapter number to its saved raw and translated files with the
+chapter title, content hash, size and source URL, so a resumed crawl can
+serve chapters from disk without refetching, re-parsing or scanning
+the chapter directories.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+from chapter_archive import PACK_NAME
+
+
+MANIFEST_VERSION = 1
+
+# Chapter files are named NovelName_Chapter_001.html and hold "<h1>{title}</h1>\n\n{content}"
+# (FileManager.save_chapter)
+LEGACY_CHAPTER_FILE = re.compile(r'_Chapter_(\d+)\.html$')
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def chapter_header(title):
+    return f"<h1>{title}</h1>\n\n"
+
+
+class ChapterManifest:
+    """
+    {'version': 1, 'chapters': {'12': {'raw': entry, 'translated': entry}}}
+    entry: {'file', 'title', 'sha256', 'size', 'url'} plus 'source_sha256'
+    (hash of the raw content it was translated from) for translations.
+
+    Entries whose file is chapters.pack are read from the novel's
+    ChapterArchive instead of a chapter file.
+
+    Writes are batched: the file is rewritten atomically every `flush_every`
+    recorded chapters and on flush(). A crash loses at most that many
+    entries, which are simply fetched again.
+    """
+
+    def __init__(self, novel_dir, flush_every=20, archive=None, logger=print):
+        self.novel_dir = novel_dir
+        self.archive = archive
+        self.path = os.path.join(novel_dir, 'manifest.json')
+        self.flush_every = flush_every
+        self.logger = logger
+        self.chapters = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.stats = {'raw_hits': 0, 'translated_hits': 0, 'misses': 0, 'invalid': 0}
+
+    @classmethod
+    def load(cls, novel_dir, flush_every=20, archive=None, logger=print):
+        manifest = cls(novel_dir, flush_every=flush_every, archive=archive, logger=logger)
+        if os.path.exists(manifest.path):
+            try:
+                with open(manifest.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == MANIFEST_VERSION:
+                    manifest.chapters = data.get('chapters', {})
+            except (OSError, ValueError) as e:
+                logger(f"  Ignoring unreadable chapter manifest ({e})")
+        else:
+            manifest._import_legacy_translations()
+        return manifest
+
+    def _import_legacy_translations(self):
+        """
+        One directory listing for novels crawled before the manifest existed:
+        translated files were already reused on resume, so index them once
+        (raw files were always refetched and are left out)
+        """
+        translated_dir = os.path.join(self.novel_dir, 'chapters_translated')
+        if not os.path.isdir(translated_dir):
+            return
+        imported = 0
+        for filename in os.listdir(translated_dir):
+            match = LEGACY_CHAPTER_FILE.search(filename)
+            if not match:
+                continue
+            try:
+                with open(os.path.join(translated_dir, filename), 'r', encoding='utf-8') as f:
+                    html = f.read()
+            except OSError:
+                continue
+            title_end = html.find('</h1>\n\n')
+            if not html.startswith('<h1>') or title_end < 0:
+                continue
+            title = html[len('<h1>'):title_end]
+            content = html[len(chapter_header(title)):]
+            self.chapters.setdefault(str(int(match.group(1))), {})['translated'] = self._entry(
+                os.path.join('chapters_translated', filename), title, content
+            )
+            imported += 1
+        if imported:
+            self.logger(f"  Indexed {imported} previously translated chapters into the chapter manifest")
+            self.flush()
+
+    @staticmethod
+    def _entry(file, title, content, url=None, source_sha256=None):
+        entry = {
+            'file': file.replace(os.sep, '/'),
+            'title': title,
+            'sha256': content_hash(content),
+            'size': len((chapter_header(title) + content).encode('utf-8')),
+        }
+        if url:
+            entry['url'] = url
+        if source_sha256:
+            entry['source_sha256'] = source_sha256
+        return entry
+
+    def get(self, chapter_number, kind):
+        with self._lock:
+            return self.chapters.get(str(chapter_number), {}).get(kind)
+
+    def record(self, chapter_number, kind, file, title, content, url=None, source_sha256=None):
+        """Record a chapter file that was just saved ('raw' or 'translated'); returns its content hash"""
+        entry = self._entry(file, title, content, url=url, source_sha256=source_sha256)
+        with self._lock:
+            self.chapters.setdefault(str(chapter_number), {})[kind] = entry
+            self._pending += 1
+            flush = self._pending >= self.flush_every
+        if flush:
+            self.flush()
+        return entry['sha256']
+
+    def read(self, chapter_number, kind, url=None, source_sha256=None):
+        """
+        (title, content) of a recorded chapter, or None if it is not recorded,
+        was recorded for a different source URL / raw content, or the file
+        no longer matches its recorded size and hash
+        """
+        entry = self.get(chapter_number, kind)
+        if entry is None or (url and entry.get('url') and entry['url'] != url) or \
+                (source_sha256 and entry.get('source_sha256') and entry['source_sha256'] != source_sha256):
+            self._count('misses')
+            return None
+        if entry['file'] == PACK_NAME:
+            data = self.archive.get(int(chapter_number), kind) if self.archive else None
+        else:
+            try:
+                with open(os.path.join(self.novel_dir, entry['file']), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                data = None
+        header = chapter_header(entry['title'])
+        text = data.decode('utf-8', errors='replace') if data is not None and len(data) == entry['size'] else ''
+        content = text[len(header):] if text.startswith(header) else None
+        if content is None or content_hash(content) != entry['sha256']:
+            self._count('invalid')
+            return None
+        self._count(f'{kind}_hits')
+        return entry['title'], content
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def flush(self):
+        """Write the manifest atomically"""
+        with self._lock:
+            data = json.dumps({'version': MANIFEST_VERSION, 'chapters': self.chapters}, ensure_ascii=False)
+            self._pending = 0
+            os.makedirs(self.novel_dir, exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
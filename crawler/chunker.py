@@ -0,0 +1,92 @@
+"""
+Packing of paragraphs into translation requests
+"""
+
+import re
+
+
+# Characters per translation request (googletrans limit is 5000).
+# Joiners are counted exactly, so only a small safety margin is needed.
+MAX_REQUEST_LENGTH = 4800
+
+# Paragraphs are joined with a blank line inside a request
+JOINER = '\n\n'
+
+# Break after CJK/latin sentence punctuation, keeping closing quotes with their sentence
+SENTENCE_BREAK = re.compile(r'(?<=[。！？!?])(?![。！？!?”」』’"）)》])|(?<=[。！？!?][”」』’"）)》])')
+CLAUSE_BREAK = re.compile(r'(?<=[，；：,;:])')
+
+
+def split_sentences(text, limit=MAX_REQUEST_LENGTH):
+    """
+    Split text into pieces of at most limit characters, on sentence punctuation
+    (。！？) first, then on clause punctuation, and as a last resort at limit.
+    """
+    for sentence in SENTENCE_BREAK.split(text):
+        if not sentence:
+            continue
+        if len(sentence) <= limit:
+            yield sentence
+            continue
+        for clause in CLAUSE_BREAK.split(sentence):
+            for start in range(0, len(clause), limit):
+                if clause[start:start + limit]:
+                    yield clause[start:start + limit]
+
+
+def pack(units, limit=MAX_REQUEST_LENGTH, joiner=JOINER):
+    """
+    Pack (key, text) units into as few requests as possible, in order.
+
+    Returns a list of chunks; each chunk is a list of (key, piece, text) where
+    piece numbers the parts of a unit. Units that fit are never split; a unit
+    longer than limit is split on sentence boundaries, and its sentences fill
+    the space left in the current chunk before starting new ones. The joiner
+    between units counts towards the limit.
+    """
+    chunks = []
+    current = []
+    length = 0
+
+    def flush():
+        nonlocal current, length
+        if current:
+            chunks.append(current)
+        current = []
+        length = 0
+
+    for key, text in units:
+        cost = len(text) + (len(joiner) if current else 0)
+        if length + cost <= limit:
+            current.append((key, 0, text))
+            length += cost
+            continue
+
+        if len(text) <= limit:
+            flush()
+            current.append((key, 0, text))
+            length = len(text)
+            continue
+
+        # Oversize unit: pack its sentences, merging neighbours in the same chunk
+        piece = -1
+        for sentence in split_sentences(text, limit):
+            if current and current[-1][0] == key and current[-1][1] == piece and length + len(sentence) <= limit:
+                current[-1] = (key, piece, current[-1][2] + sentence)
+                length += len(sentence)
+                continue
+            piece += 1
+            cost = len(sentence) + (len(joiner) if current else 0)
+            if length + cost > limit:
+                flush()
+                cost = len(sentence)
+            current.append((key, piece, sentence))
+            length += cost
+
+    flush()
+    return chunks
+
+
+def chunk_length(chunk, joiner=JOINER):
+    """Characters a packed chunk sends"""
+    return sum(len(text) for _, _, text in chunk) + len(joiner) * (len(chunk) - 1)
@@ -0,0 +1,124 @@
+"""
+Concurrency helpers shared by the crawler stages
+"""
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+class HostLimiter:
+    """
+    Caps the number of in-flight requests per host.
+    One limiter is shared by every worker thread, so limits are global
+    to the process. limits maps a host (or a service name such as
+    'translator') to its own cap; other hosts use max_per_host.
+    """
+
+    def __init__(self, max_per_host=4, limits=None):
+        self.max_per_host = max(1, int(max_per_host))
+        self.limits = {key: max(1, int(value)) for key, value in (limits or {}).items()}
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host):
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.limits.get(host, self.max_per_host))
+                self._semaphores[host] = semaphore
+            return semaphore
+
+    @contextmanager
+    def limit(self, url):
+        """Hold one request slot for the host of url (or a service name) while the block runs"""
+        host = urlparse(url).netloc or url
+        with self._semaphore(host):
+            yield
+
+
+def ordered_map(func, items, max_workers=4):
+    """
+    Run func over items on a thread pool and yield results in input order.
+    At most 2 * max_workers calls are in flight, so memory stays bounded
+    no matter how many items there are.
+    """
+    max_workers = max(1, int(max_workers))
+    window = max_workers * 2
+    pending = deque()
+    items = iter(items)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for item in items:
+            pending.append((item, executor.submit(func, item)))
+            if len(pending) >= window:
+                item, future = pending.popleft()
+                yield item, future.result()
+
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    finally:
+        # Generator closed early (error or early return) - drop queued work
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class WorkerPool:
+    """
+    K worker threads pulling items from a shared bounded queue.
+    submit() blocks while the queue is full, so the producer never runs
+    far ahead of the workers. handler(item) exceptions are the handler's
+    responsibility - a worker keeps going after each item.
+    """
+
+    _DONE = object()
+
+    def __init__(self, handler, workers, queue_size=None):
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.queue = queue.Queue(maxsize=queue_size or self.workers * 2)
+        self._stopping = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run, name=f'novel-worker-{n + 1}', daemon=True)
+            for n in range(self.workers)
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def submit(self, item):
+        # Short timeouts keep the main thread responsive to KeyboardInterrupt
+        while True:
+            try:
+                self.queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def join(self):
+        """Wait for every submitted item to be handled"""
+        for _ in self._threads:
+            self.submit(self._DONE)
+        for thread in self._threads:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+
+    def stop(self):
+        """Ask workers to exit after their current item"""
+        self._stopping.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is self._DONE:
+                return
+            self.handler(item)
@@ -4,115 +4,148 @@ Category crawler - Crawls all novels from a category page with pagination
 
 import sys
 import time
+import threading
 from crawler import NovelCrawler
 
 
-def crawl_category(category_url, max_pages=None):
-    """Crawl all novels from a category with pagination"""
+def crawl_category(category_url, max_pages=None, profile=False):
+    """Crawl all novels from a category with pagination (profile: see NovelCrawler.start_profiling)"""
     crawler = NovelCrawler()
+    if profile:
+        crawler.start_profiling()
     
     current_url = category_url
     page_num = 1
     total_novels_processed = 0
+    processed_lock = threading.Lock()
     
-    print("\n" + "="*60)
-    print(f"Starting Category Crawl: {category_url}")
-    print("="*60 + "\n")
+    crawler.log("\n" + "="*60)
+    crawler.log(f"Starting Category Crawl: {category_url}")
+    crawler.log("="*60 + "\n")
     
-    while current_url:
-        print(f"\n{'='*60}")
-        print(f"Processing Category Page {page_num}")
-        print(f"{'='*60}\n")
+    def process_novel(novel_url, listing=None):
+        """Crawl one novel, skipping unchanged completed ones and marking failures. Returns True if crawled"""
+        nonlocal total_novels_processed
         
-        # Parse category page
-        novels, pagination = crawler.parser.parse_category_page(current_url)
+        # Check if novel was already processed (and the category listing shows no update)
+        novel_progress = crawler.file_manager.get_novel_progress(novel_url)
         
-        print(f"Found {len(novels)} novels on page {pagination['current']}/{pagination['total']}")
-        print(f"Category Page: {current_url}\n")
-        
-        # Check if we should stop at max_pages
-        if max_pages and page_num > max_pages:
-            print(f"\nReached maximum pages limit ({max_pages}). Stopping.")
-            break
+        if novel_progress.get('status') == 'completed' and crawler.completed_novel_unchanged(novel_progress, listing):
+            crawler.log(f"✓ Skipping: Already completed ({novel_progress.get('chapters_crawled')} chapters)")
+            with processed_lock:
+                total_novels_processed += 1
+            return False
         
-        # Crawl each novel on this page
-        for idx, novel_url in enumerate(novels, 1):
-            print(f"\n[Novel {idx}/{len(novels)} on page {page_num}]")
-            print(f"URL: {novel_url}")
+        # Crawl the novel
+        try:
+            crawler.crawl_novel(novel_url, listing)
+            with processed_lock:
+                total_novels_processed += 1
+            crawler.log(f"\n✓ Novel completed successfully\n")
+            return True
+        except Exception as e:
+            crawler.log(f"\n✗ Error crawling novel: {e}", 'error', novel_url=novel_url)
+            # Mark as failed
+            crawler.file_manager.update_novel_progress(
+                novel_url, 'failed',
+                chapters_crawled=0,
+                chapters_total=0,
+                story_id=None
+            )
+            crawler.log(f"Continuing to next novel...\n")
+            return False
+    
+    # Worker mode: K novels crawl in parallel from a shared queue; per-host
+    # limits in the crawler replace the fixed sleeps between novels
+    workers = crawler.start_novel_workers(process_novel) if crawler.novel_workers > 1 else None
+    
+    try:
+        while current_url:
+            crawler.log(f"\n{'='*60}")
+            crawler.log(f"Processing Category Page {page_num}")
+            crawler.log(f"{'='*60}\n")
             
-            # Check if novel was already processed
-            state = crawler.file_manager.load_crawler_state()
-            novel_progress = state['processed_novels'].get(novel_url, {})
+            # Parse category page
+            novels, pagination = crawler.parser.parse_category_listing(current_url)
             
-            if novel_progress.get('status') == 'completed':
-                print(f"✓ Skipping: Already completed ({novel_progress.get('chapters_crawled')} chapters)")
-                total_novels_processed += 1
-                continue
+            crawler.log(f"Found {len(novels)} novels on page {pagination['current']}/{pagination['total']}")
+            crawler.log(f"Category Page: {current_url}\n")
             
-            # Crawl the novel
-            try:
-                crawler.crawl_novel(novel_url)
-                total_novels_processed += 1
-                print(f"\n✓ Novel completed successfully\n")
-            except KeyboardInterrupt:
-                print("\n\n⚠ Crawl interrupted by user")
-                print(f"Progress saved. Processed {total_novels_processed} novels so far.")
-                print(f"Resume by running the same command again.\n")
-                sys.exit(0)
-            except Exception as e:
-                print(f"\n✗ Error crawling novel: {e}")
-                # Mark as failed
-                crawler.file_manager.update_novel_progress(
-                    novel_url, 'failed',
-                    chapters_crawled=0,
-                    chapters_total=0,
-                    story_id=None
-                )
-                print(f"Continuing to next novel...\n")
-                continue
+            # Check if we should stop at max_pages
+            if max_pages and page_num > max_pages:
+                crawler.log(f"\nReached maximum pages limit ({max_pages}). Stopping.")
+                break
             
-            # Small delay between novels
-            time.sleep(2)
-        
-        # Update state with last processed page
-        state = crawler.file_manager.load_crawler_state()
-        state['last_category_page'] = current_url
-        crawler.file_manager.save_crawler_state(state)
+            # Crawl each novel on this page
+            for idx, listing in enumerate(novels, 1):
+                novel_url = listing['url']
+                crawler.log(f"\n[Novel {idx}/{len(novels)} on page {page_num}]")
+                crawler.log(f"URL: {novel_url}")
+                
+                if workers:
+                    workers.submit((novel_url, listing))
+                    continue
+                
+                if process_novel(novel_url, listing):
+                    # Small delay between novels
+                    time.sleep(2)
+            
+            # Update state with last processed page
+            crawler.file_manager.set_last_category_page(current_url)
+            
+            # Move to next page
+            if pagination['next']:
+                current_url = pagination['next']
+                page_num += 1
+                crawler.log(f"\n→ Moving to next page: {current_url}")
+                time.sleep(3)  # Delay between pages
+            else:
+                crawler.log(f"\n✓ Reached last page of category")
+                break
         
-        # Move to next page
-        if pagination['next']:
-            current_url = pagination['next']
-            page_num += 1
-            print(f"\n→ Moving to next page: {current_url}")
-            time.sleep(3)  # Delay between pages
-        else:
-            print(f"\n✓ Reached last page of category")
-            break
+        if workers:
+            # Wait for queued novels to finish
+            workers.join()
+    except KeyboardInterrupt:
+        if workers:
+            workers.stop()
+        crawler.log("\n\n⚠ Crawl interrupted by user")
+        crawler.log(f"Progress saved. Processed {total_novels_processed} novels so far.")
+        crawler.log(f"Resume by running the same command again.\n")
+        sys.exit(0)
+    finally:
+        crawler.finish_covers()
+        crawler.stop_profiling()
+        crawler.write_metrics()
     
-    print("\n" + "="*60)
-    print("Category Crawl Complete!")
-    print("="*60)
-    print(f"Total novels processed: {total_novels_processed}")
-    print(f"Pages processed: {page_num}")
-    print("")
+    crawler.log("\n" + "="*60)
+    crawler.log("Category Crawl Complete!")
+    crawler.log("="*60)
+    crawler.log(f"Total novels processed: {total_novels_processed}")
+    crawler.log(f"Pages processed: {page_num}")
+    crawler.log("")
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python crawl_category.py <category_url> [max_pages]")
+    args = [arg for arg in sys.argv[1:] if arg != '--profile']
+    profile = len(args) < len(sys.argv) - 1
+    if not args:
+        print("Usage: python crawl_category.py <category_url> [max_pages] [--profile]")
         print("\nExample:")
         print("  python crawl_category.py https://www.xbanxia.cc/list/1_1.html")
         print("  python crawl_category.py https://www.xbanxia.cc/list/1_1.html 5")
+        print("  python crawl_category.py https://www.xbanxia.cc/list/1_1.html 1 --profile")
         print("\nThis will crawl all novels from the category, with automatic resume on failure.")
+        print("--profile writes cProfile, per-phase allocation and sampled stack reports to profile/.")
         sys.exit(1)
     
-    category_url = sys.argv[1]
-    max_pages = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    category_url = args[0]
+    max_pages = int(args[1]) if len(args) > 1 else None
     
     if max_pages:
         print(f"Will process maximum {max_pages} pages")
     
-    crawl_category(category_url, max_pages)
+    crawl_category(category_url, max_pages, profile)
 
 
 if __name__ == '__main__':
@@ -8,18 +8,42 @@ import sys
 import os
 import json
 import time
-from translator import Translator
+import threading
+from urllib.parse import urlparse
+from translator import Translator, is_untranslated
+from chapter_manifest import content_hash
 from parser import NovelParser
 from wordpress_api import WordPressAPI
 from file_manager import FileManager
 from config_loader import load_config
+from concurrency import HostLimiter, WorkerPool, ordered_map
+from http_cache import ResponseCache
+from translation_memory import TranslationMemory
+from rate_controller import RateController
+from metrics import Metrics
+from profiling import Profiler
+from structured_logging import StructuredLogger
+from pipeline import AdaptiveBatchSizer, ChapterUploader, CoverPrefetcher
 
 
 class NovelCrawler:
-    def __init__(self, config_path='config.json'):
-        """Initialize the crawler with configuration"""
+    def __init__(self, config_path='config.json', translator_client_factory=None):
+        """
+        Initialize the crawler with configuration
+        translator_client_factory replaces the googletrans client (benchmarks use a stub)
+        """
         self.config = load_config(config_path)
         
+        # OPTIMIZATION: Log records are queued and written by a background thread
+        # (console + JSON lines), so chapter loops never block on console I/O
+        self.logger = StructuredLogger(
+            level=self.config.get('log_level', 'info'),
+            console=self.config.get('log_console', True),
+            json_path=self.config.get('log_json_path', 'crawler_log.jsonl') or None,
+            json_level=self.config.get('log_json_level', 'debug'),
+            rate_limit_interval=self.config.get('log_chapter_interval', 5)
+        )
+        
         # Configuration
         self.wordpress_url = self.config['wordpress_url']
         self.api_key = self.config['api_key']
@@ -30,6 +54,32 @@ class NovelCrawler:
         self.should_translate = self.config.get('translate', False)
         self.target_language = self.config.get('target_language', 'en')
         
+        # Per-stage latency histograms and request/byte/retry/cache counters for this run
+        self.metrics = Metrics()
+        # Set by start_profiling() (--profile)
+        self.profiler = None
+        
+        # Per-thread log context (novel tag in multi-novel worker mode)
+        self._log_context = threading.local()
+        
+        # OPTIMIZATION: Concurrent chapter fetching (results still consumed in chapter order)
+        self.fetch_workers = max(1, self.config.get('fetch_workers', 4))
+        self.max_requests_per_host = self.config.get('max_requests_per_host', 4)
+        
+        # OPTIMIZATION: Multi-novel worker mode for category crawls
+        # One limiter is shared by all workers, so each host has a global concurrency cap
+        self.novel_workers = max(1, self.config.get('novel_workers', 1))
+        
+        # OPTIMIZATION: Re-check completed novels only when their update markers change
+        self.incremental_updates = self.config.get('incremental_updates', True)
+        
+        # OPTIMIZATION: Per-story chapter-existence index (state store) replaces WordPress status checks
+        self.chapter_index_enabled = self.config.get('chapter_index_enabled', True)
+        self.host_limiter = HostLimiter(self.max_requests_per_host, limits={
+            urlparse(self.wordpress_url).netloc: self.config.get('wordpress_concurrency', 4),
+            'translator': self.config.get('translator_concurrency', 2),
+        })
+        
         # Initialize modules
         self.translator = None
         if self.should_translate:
@@ -40,7 +90,27 @@ class NovelCrawler:
                 cred_file = os.path.join(os.path.dirname(__file__), self.google_credentials_file)
             else:
                 cred_file = None
-            self.translator = Translator(self.google_project_id, self.log, cred_file)
+            # OPTIMIZATION: Persistent translation memory (repeated paragraphs cost nothing)
+            memory = None
+            if self.config.get('translation_memory_enabled', True):
+                memory = TranslationMemory(
+                    'translation_memory.db',
+                    max_bytes=self.config.get('translation_memory_max_mb', 500) * 1024 * 1024,
+                    untranslated_cjk_ratio=self.config.get('untranslated_cjk_ratio', 0.3)
+                )
+            self.translator = Translator(
+                self.google_project_id, self.log, cred_file, self.host_limiter, memory,
+                max_in_flight=self.config.get('translator_concurrency', 2),
+                rate_controller=RateController(
+                    rate=self.config.get('translator_rate', 2.0),
+                    min_rate=self.config.get('translator_min_rate', 0.05),
+                    max_rate=self.config.get('translator_max_rate', 10.0)
+                ),
+                max_attempts=self.config.get('translator_max_attempts', 8),
+                untranslated_cjk_ratio=self.config.get('untranslated_cjk_ratio', 0.3),
+                client_factory=translator_client_factory,
+                metrics=self.metrics
+            )
         
         # CRITICAL: Verify translator initialized
         if self.should_translate:
@@ -49,83 +119,192 @@ class NovelCrawler:
                 self.log("Please check if googletrans==4.0.0rc1 is installed: pip install googletrans==4.0.0rc1")
                 raise Exception("Translation service initialization failed")
         
-        self.parser = NovelParser(self.log)
-        self.wordpress = WordPressAPI(self.wordpress_url, self.api_key, self.log)
-        self.file_manager = FileManager(self.log)
+        # OPTIMIZATION: Persistent page cache with ETag/Last-Modified revalidation
+        self.page_cache = None
+        if self.config.get('http_cache_enabled', True):
+            self.page_cache = ResponseCache(
+                'http_cache.db',
+                max_bytes=self.config.get('http_cache_max_mb', 200) * 1024 * 1024,
+                ttls=self.config.get('http_cache_ttl')
+            )
+        
+        self.parser = NovelParser(self.log, self.host_limiter,
+                                  pool_size=max(self.fetch_workers, self.max_requests_per_host),
+                                  cache=self.page_cache, metrics=self.metrics)
+        self.wordpress = WordPressAPI(
+            self.wordpress_url, self.api_key, self.log, self.host_limiter, self.metrics,
+            compress_requests=self.config.get('wordpress_gzip', True),
+            compress_min_bytes=self.config.get('wordpress_gzip_min_bytes', 1024)
+        )
+        self.file_manager = FileManager(
+            self.log, self.config.get('state_backend', 'sqlite'),
+            flush_interval=self.config.get('state_flush_interval', 5),
+            flush_every=self.config.get('state_flush_every', 50),
+            chapter_storage=self.config.get('chapter_storage', 'files')
+        )
+        # OPTIMIZATION: Covers download in the background over the parser's keep-alive session,
+        # revalidated with ETag/Last-Modified instead of re-downloaded
+        self.cover_prefetcher = CoverPrefetcher(
+            self.file_manager.download_cover, self.log,
+            workers=self.config.get('cover_workers', 2),
+            session=self.parser.session, host_limiter=self.host_limiter, metrics=self.metrics
+        )
         
         # OPTIMIZATION: Batch configuration
         self.bulk_chapter_size = self.config.get('bulk_chapter_size', 50)  # Create chapters in batches (increased from 25)
+        # OPTIMIZATION: Batches are cut by payload bytes (bulk_chapter_size stays the count cap);
+        # the byte target adapts to observed bulk latency and errors
+        self.batch_sizer = AdaptiveBatchSizer(
+            target_bytes=int(self.config.get('bulk_batch_kb', 1024) * 1024),
+            min_bytes=int(self.config.get('bulk_batch_min_kb', 64) * 1024),
+            max_bytes=int(self.config.get('bulk_batch_max_kb', 8192) * 1024),
+            max_chapters=self.bulk_chapter_size,
+            target_seconds=self.config.get('bulk_target_seconds', 30)
+        )
     
-    def log(self, message):
-        """Print log message with Unicode error handling"""
-        try:
-            print(message)
-        except UnicodeEncodeError:
-            print(message.encode('ascii', 'replace').decode('ascii'))
+    def start_profiling(self):
+        """Profile the rest of the run (cProfile, tracemalloc per phase, sampled stacks)"""
+        self.profiler = Profiler(
+            self.config.get('profile_dir', 'profile'),
+            top=self.config.get('profile_top', 25),
+            sample_interval=self.config.get('profile_sample_interval', 0.005),
+            logger=self.log
+        ).start()
+        self.log(f"Profiling enabled - reports go to {self.profiler.output_dir}/")
     
-    def process_chapters_in_batches(self, chapters_data, story_id, novel_url, total_chapters):
+    def stop_profiling(self):
+        """Write the profiling reports"""
+        if self.profiler:
+            self.profiler.stop()
+            self.profiler = None
+    
+    def start_profile_phase(self, name):
+        """Token for end_profile_phase (None when not profiling)"""
+        return self.profiler.start_phase(name) if self.profiler else None
+    
+    def end_profile_phase(self, token):
+        if self.profiler and token:
+            self.profiler.end_phase(token)
+    
+    def log(self, message, level='info', **fields):
+        """
+        Queue a log message (never blocks on console I/O).
+        fields become JSON keys in the JSON-lines log; rate_limit='chapter'
+        thins a message out on the console (see structured_logging.RateLimitFilter);
+        exc_info=True attaches the traceback of the exception being handled
         """
-        Process chapters in batches for optimal performance
+        tag = getattr(self._log_context, 'tag', None)
+        if tag:
+            # Prefixes every console line so interleaved worker output stays attributable
+            fields.setdefault('tag', tag)
+        self.logger.log(str(message), level, **fields)
+    
+    def upload_chapter_batch(self, batch, story_id, novel_url, total_chapters, label=''):
+        """
+        Upload one batch of chapters (bulk first, bisecting on failure)
         CRITICAL: Maintains sequential order of chapters
+        Returns (created, existed)
         """
-        total_to_process = len(chapters_data)
-        chapters_created = 0
-        chapters_existed = 0
+        payload_bytes = sum(self.batch_sizer.payload_size(chapter_data) for chapter_data in batch)
+        self.log(f"\n  📦 Batch {label}: Creating chapters {batch[0]['chapter_number']}-{batch[-1]['chapter_number']} "
+                 f"({payload_bytes / 1024:.0f} KB)...")
+        return self._upload_chapters(batch, story_id, novel_url, total_chapters, payload_bytes, top_level=True)
+    
+    def _upload_chapters(self, batch, story_id, novel_url, total_chapters, payload_bytes=None, top_level=False):
+        """
+        Bulk-create batch; if the request fails, split it in half and upload the halves
+        in order, so one bad chapter costs about 2*log2(N) requests instead of N.
+        A single chapter that still fails in bulk is tried once through the single-chapter endpoint.
+        """
+        if payload_bytes is None:
+            payload_bytes = sum(self.batch_sizer.payload_size(chapter_data) for chapter_data in batch)
         
-        # Process in batches
-        for batch_start in range(0, total_to_process, self.bulk_chapter_size):
-            batch_end = min(batch_start + self.bulk_chapter_size, total_to_process)
-            batch = chapters_data[batch_start:batch_end]
-            
-            batch_num = (batch_start // self.bulk_chapter_size) + 1
-            total_batches = (total_to_process + self.bulk_chapter_size - 1) // self.bulk_chapter_size
-            
-            self.log(f"\n  📦 Batch {batch_num}/{total_batches}: Creating chapters {batch[0]['chapter_number']}-{batch[-1]['chapter_number']}...")
-            
-            # Try bulk creation first
+        start = time.perf_counter()
+        with self.metrics.timer('create_chapters_bulk'):
             bulk_result = self.wordpress.create_chapters_bulk(batch)
+        elapsed = time.perf_counter() - start
+        # Sub-batch failures are expected while isolating a bad chapter - only the
+        # first failure of a batch says anything about the server's capacity
+        if bulk_result['success'] or top_level:
+            self.batch_sizer.record(payload_bytes, elapsed, bulk_result['success'])
+        
+        if bulk_result['success']:
+            first, last = batch[0]['chapter_number'], batch[-1]['chapter_number']
+            self.log(f"    ✓ Chapters {first}-{last}: {bulk_result['created']} created, {bulk_result['existed']} existed, "
+                     f"{bulk_result['failed']} failed ({len(batch)} total, {elapsed:.1f}s)")
+            self.metrics.inc('chapters_total', bulk_result['created'], outcome='created')
+            self.metrics.inc('chapters_total', bulk_result['existed'], outcome='existed')
+            if self.chapter_index_enabled:
+                self.file_manager.add_chapters_to_cache(story_id, self._stored_chapter_numbers(bulk_result))
             
-            if bulk_result['success']:
-                # Bulk creation succeeded
-                self.log(f"    ✓ Batch complete: {bulk_result['created']} created, {bulk_result['existed']} existed, {bulk_result['failed']} failed ({len(batch)} total)")
-                chapters_created += bulk_result['created']
-                chapters_existed += bulk_result['existed']
-                
-                # Update progress after each batch
-                last_chapter_num = batch[-1]['chapter_number']
-                self.file_manager.update_novel_progress(
-                    novel_url, 'in_progress',
-                    chapters_crawled=last_chapter_num,
-                    chapters_total=total_chapters,
-                    story_id=story_id
-                )
-            else:
-                # Fallback to individual creation (maintains order)
-                self.log(f"    ⚠ Bulk failed, falling back to individual creation...")
-                for chapter_data in batch:
-                    try:
-                        chapter_result = self.wordpress.create_chapter(chapter_data)
-                        if chapter_result.get('existed'):
-                            chapters_existed += 1
-                        else:
-                            chapters_created += 1
-                        
-                        # Update progress after each chapter
-                        self.file_manager.update_novel_progress(
-                            novel_url, 'in_progress',
-                            chapters_crawled=chapter_data['chapter_number'],
-                            chapters_total=total_chapters,
-                            story_id=story_id
-                        )
-                    except Exception as e:
-                        self.log(f"    ✗ Failed chapter {chapter_data['chapter_number']}: {e}")
-                        raise  # Stop on error to maintain sequence
-            
-            # Delay between batches (not after last batch)
-            if batch_end < total_to_process:
-                time.sleep(self.delay)
+            # Update progress after each batch
+            self.file_manager.update_novel_progress(
+                novel_url, 'in_progress',
+                chapters_crawled=last,
+                chapters_total=total_chapters,
+                story_id=story_id
+            )
+            return bulk_result['created'], bulk_result['existed']
+        
+        if len(batch) == 1:
+            chapter_data = batch[0]
+            self.log(f"    ⚠ Bulk failed for chapter {chapter_data['chapter_number']}, trying single-chapter upload...", 'warning')
+            self.metrics.inc('retries_total', service='wordpress', reason='bulk_fallback')
+            try:
+                with self.metrics.timer('create_chapter'):
+                    chapter_result = self.wordpress.create_chapter(chapter_data)
+            except Exception as e:
+                self.log(f"    ✗ Failed chapter {chapter_data['chapter_number']}: {e}", 'error', chapter=chapter_data['chapter_number'])
+                raise  # Stop on error to maintain sequence
+            existed = bool(chapter_result.get('existed'))
+            self.metrics.inc('chapters_total', outcome='existed' if existed else 'created')
+            if self.chapter_index_enabled:
+                self.file_manager.add_chapter_to_cache(story_id, chapter_data['chapter_number'])
+            self.file_manager.update_novel_progress(
+                novel_url, 'in_progress',
+                chapters_crawled=chapter_data['chapter_number'],
+                chapters_total=total_chapters,
+                story_id=story_id
+            )
+            return (0, 1) if existed else (1, 0)
+        
+        # Split in half; the left half goes first so chapters stay in order
+        middle = len(batch) // 2
+        self.log(f"    ⚠ Bulk failed for {len(batch)} chapters ({bulk_result.get('error', '')[:200]}) - "
+                 f"splitting into {middle} + {len(batch) - middle}", 'warning')
+        self.metrics.inc('retries_total', service='wordpress', reason='bisect')
+        created, existed = self._upload_chapters(batch[:middle], story_id, novel_url, total_chapters)
+        right_created, right_existed = self._upload_chapters(batch[middle:], story_id, novel_url, total_chapters)
+        return created + right_created, existed + right_existed
+    
+    @staticmethod
+    def _stored_chapter_numbers(bulk_result):
+        """
+        Chapter numbers a bulk request confirmed as stored: per-chapter results
+        with status created/existed or a chapter_id. Anything else (other statuses,
+        no per-chapter results) stays out of the index and is checked again next run
+        """
+        return [result['chapter_number'] for result in bulk_result.get('results') or []
+                if result.get('chapter_number') is not None
+                and (result.get('status') in ('created', 'existed') or result.get('chapter_id'))]
+    
+    def start_novel_workers(self, handle_novel):
+        """
+        Start the multi-novel worker pool (novel_workers threads sharing one queue of novel URLs).
+        Submit (novel_url, listing) items; each worker runs handle_novel(novel_url, listing)
+        with its log lines tagged by novel ID.
+        """
+        def run(item):
+            novel_url, listing = item
+            novel_id = novel_url.rstrip('/').split('/')[-1].replace('.html', '')
+            self._log_context.tag = f"novel {novel_id}"
+            try:
+                handle_novel(novel_url, listing)
+            finally:
+                self._log_context.tag = None
         
-        return chapters_created, chapters_existed
+        self.log(f"Multi-novel worker mode: {self.novel_workers} novels in parallel")
+        return WorkerPool(run, self.novel_workers).start()
     
     def crawl_category(self, category_url, max_pages=None):
         """Crawl all novels from a category page with pagination"""
@@ -137,6 +316,19 @@ class NovelCrawler:
         current_url = category_url
         page_count = 0
         total_novels_processed = 0
+        processed_lock = threading.Lock()
+        
+        def handle_novel(novel_url, listing=None):
+            nonlocal total_novels_processed
+            try:
+                self.crawl_novel(novel_url, listing)
+                with processed_lock:
+                    total_novels_processed += 1
+            except Exception as e:
+                self.log(f"✗ Error crawling novel: {e}", 'error', exc_info=True, novel_url=novel_url)
+        
+        # Worker mode: novels are handed to a shared queue instead of crawled inline
+        workers = self.start_novel_workers(handle_novel) if self.novel_workers > 1 else None
         
         while current_url:
             page_count += 1
@@ -153,27 +345,20 @@ class NovelCrawler:
                 self.log(f"{'='*50}")
                 self.log(f"URL: {current_url}\n")
                 
-                novels, pagination = self.parser.parse_category_page(current_url)
+                novels, pagination = self.parser.parse_category_listing(current_url)
                 
                 self.log(f"Found {len(novels)} novels on page {pagination['current']}/{pagination['total']}")
                 
                 # Process each novel on this page
-                for idx, novel_url in enumerate(novels, 1):
+                for idx, listing in enumerate(novels, 1):
+                    novel_url = listing['url']
                     self.log(f"\n--- Novel {idx}/{len(novels)} on Page {page_count} ---")
                     self.log(f"URL: {novel_url}")
                     
-                    try:
-                        self.crawl_novel(novel_url)
-                        total_novels_processed += 1
-                    except KeyboardInterrupt:
-                        self.log("\n\n⚠ Interrupted by user")
-                        self.log(f"Processed {total_novels_processed} novels across {page_count} pages")
-                        return
-                    except Exception as e:
-                        self.log(f"✗ Error crawling novel: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
+                    if workers:
+                        workers.submit((novel_url, listing))
+                    else:
+                        handle_novel(novel_url, listing)
                 
                 # Move to next page
                 current_url = pagination.get('next')
@@ -186,15 +371,25 @@ class NovelCrawler:
                     break
                     
             except KeyboardInterrupt:
+                if workers:
+                    workers.stop()
                 self.log("\n\n⚠ Interrupted by user")
                 self.log(f"Processed {total_novels_processed} novels across {page_count} pages")
                 return
             except Exception as e:
-                self.log(f"\n✗ Error processing page: {e}")
-                import traceback
-                traceback.print_exc()
+                self.log(f"\n✗ Error processing page: {e}", 'error', exc_info=True, page_url=current_url)
                 break
         
+        if workers:
+            # Wait for queued novels to finish
+            try:
+                workers.join()
+            except KeyboardInterrupt:
+                workers.stop()
+                self.log("\n\n⚠ Interrupted by user")
+                self.log(f"Processed {total_novels_processed} novels across {page_count} pages")
+                return
+        
         self.log("\n" + "="*50)
         self.log("Category Crawling Complete!")
         self.log("="*50)
@@ -202,17 +397,39 @@ class NovelCrawler:
         self.log(f"Total novels processed: {total_novels_processed}")
         self.log("")
     
-    def crawl_novel(self, novel_url):
-        """Main crawling process"""
+    def listing_markers(self, listing):
+        """Update markers from a category listing entry (kept apart from novel page markers)"""
+        if not listing:
+            return {}
+        return {f'listing_{key}': listing[key] for key in ('latest_chapter', 'last_updated') if listing.get(key)}
+    
+    def completed_novel_unchanged(self, novel_progress, listing=None):
+        """
+        True if a completed novel can be skipped without fetching anything:
+        incremental updates are disabled, or the category listing markers match the stored ones.
+        False means the novel changed or the listing had nothing to compare (check the novel page).
+        """
+        if not self.incremental_updates:
+            return True
+        fresh = self.listing_markers(listing)
+        stored = novel_progress.get('markers') or {}
+        compared = [key for key in fresh if stored.get(key)]
+        return bool(compared) and all(stored[key] == fresh[key] for key in compared)
+    
+    def crawl_novel(self, novel_url, listing=None):
+        """
+        Main crawling process
+        listing: optional category listing entry with update markers (see NovelParser.parse_category_listing)
+        """
         self.log("\n" + "="*50)
         self.log("Starting Novel Crawler")
         self.log("="*50 + "\n")
         
         # Check crawler state for this novel
-        crawler_state = self.file_manager.load_crawler_state()
-        novel_progress = crawler_state['processed_novels'].get(novel_url, {})
+        novel_progress = self.file_manager.get_novel_progress(novel_url)
         
         resume_from_chapter = 0
+        check_for_updates = False
         
         # Check if novel is truly completed (all chapters processed)
         if novel_progress.get('status') == 'completed':
@@ -220,11 +437,16 @@ class NovelCrawler:
             chapters_total = novel_progress.get('chapters_total', 0)
             
             # Only skip if all chapters are truly done
-            if chapters_crawled >= chapters_total:
+            if chapters_crawled >= chapters_total and self.completed_novel_unchanged(novel_progress, listing):
                 self.log(f"✓ Novel already fully completed: {novel_url}")
                 self.log(f"  All {chapters_crawled}/{chapters_total} chapters processed")
                 self.log(f"  Story ID: {novel_progress.get('story_id')}")
                 return
+            elif chapters_crawled >= chapters_total:
+                # OPTIMIZATION: Incremental mode - only changed novels go past the novel page
+                self.log(f"⟳ Checking completed novel for new chapters: {novel_url}")
+                resume_from_chapter = chapters_crawled
+                check_for_updates = True
             else:
                 # Marked completed but not all chapters done - resume
                 self.log(f"⟳ Novel marked completed but has more chapters: {novel_url}")
@@ -242,9 +464,10 @@ class NovelCrawler:
         success, result = self.wordpress.test_connection()
         if success:
             cached_indicator = " (cached)" if result.get('cached') else ""
-            self.log(f"  Connected{cached_indicator} (WordPress v{result.get('wordpress', 'unknown')})")
+            compression = ", gzip uploads" if self.wordpress.gzip_supported else ""
+            self.log(f"  Connected{cached_indicator} (WordPress v{result.get('wordpress', 'unknown')}{compression})")
         else:
-            self.log(f"  Failed: {result}")
+            self.log(f"  Failed: {result}", 'error')
             return
         
         # Step 2: Fetch and parse novel page
@@ -252,6 +475,26 @@ class NovelCrawler:
         novel_data, novel_id = self.parser.parse_novel_page(novel_url)
         self.log(f"  Fetched ({len(str(novel_data))} bytes)")
         
+        # Source update markers, stored with progress so unchanged novels can be skipped next run
+        markers = {
+            'latest_chapter': novel_data['latest_chapter'],
+            'last_updated': novel_data['last_updated'],
+            'chapter_count': len(novel_data['chapters']),
+        }
+        markers.update(self.listing_markers(listing))
+        
+        if check_for_updates and len(novel_data['chapters']) <= resume_from_chapter:
+            # Nothing new - skip story/chapter status round trips and remember the markers
+            self.log(f"  ✓ No new chapters ({len(novel_data['chapters'])} total) - skipping")
+            self.file_manager.update_novel_progress(
+                novel_url, 'completed',
+                chapters_crawled=resume_from_chapter,
+                chapters_total=len(novel_data['chapters']),
+                story_id=novel_progress.get('story_id'),
+                markers=markers
+            )
+            return
+        
         # Step 3: Parse novel data
         self.log("\n[3/6] Parsing novel data...")
         self.log(f"  Title: {novel_data['title']}")
@@ -262,34 +505,47 @@ class NovelCrawler:
         self.log("\n[4/6] Translating metadata...")
         if self.should_translate and self.translator and self.translator.client:
             # Check if already translated in metadata
+            existing_meta = {}
             existing_metadata_path = os.path.join('novels', f'novel_{novel_id}', 'metadata.json')
             if os.path.exists(existing_metadata_path):
                 try:
                     with open(existing_metadata_path, 'r', encoding='utf-8') as f:
                         existing_meta = json.load(f)
-                        if existing_meta.get('title_translated'):
-                            translated_title = existing_meta['title_translated']
-                            self.log(f"  Using cached title: {translated_title}")
-                        else:
-                            translated_title = self.translator.translate(novel_data['title'])
-                            self.log(f"  Title (EN): {translated_title}")
-                        
-                        if existing_meta.get('description_translated'):
-                            translated_description = existing_meta['description_translated']
-                            self.log(f"  Using cached description")
-                        else:
-                            translated_description = self.translator.translate(novel_data['description'])
-                            self.log(f"  Description (EN): Translated")
                 except:
-                    translated_title = self.translator.translate(novel_data['title'])
-                    translated_description = self.translator.translate(novel_data['description'])
+                    existing_meta = {}
+            
+            translated_title = existing_meta.get('title_translated')
+            translated_description = existing_meta.get('description_translated')
+            # Older runs could save the source text when translation failed - translate those again
+            if translated_title and is_untranslated(novel_data['title'], translated_title, self.target_language,
+                                                    self.translator.untranslated_cjk_ratio):
+                translated_title = None
+            if translated_description and is_untranslated(novel_data['description'], translated_description,
+                                                          self.target_language, self.translator.untranslated_cjk_ratio):
+                translated_description = None
+            if translated_title:
+                self.log(f"  Using cached title: {translated_title}")
+            if translated_description:
+                self.log(f"  Using cached description")
+            
+            # OPTIMIZATION: Title and description share one translation request
+            missing = [field for field, value in (('title', translated_title), ('description', translated_description)) if not value]
+            if missing:
+                try:
+                    translations = dict(zip(missing, self.translator.translate_many(
+                        [novel_data[field] for field in missing], strict=True
+                    )))
+                except Exception as e:
+                    # Never store or upload the source text as the translated title/description
+                    self.log(f"  Metadata translation failed: {e}", 'error')
+                    self.log(f"  STOPPING: Cannot proceed without a translated title", 'critical')
+                    return
+                if 'title' in translations:
+                    translated_title = translations['title']
                     self.log(f"  Title (EN): {translated_title}")
+                if 'description' in translations:
+                    translated_description = translations['description']
                     self.log(f"  Description (EN): Translated")
-            else:
-                translated_title = self.translator.translate(novel_data['title'])
-                translated_description = self.translator.translate(novel_data['description'])
-                self.log(f"  Title (EN): {translated_title}")
-                self.log(f"  Description (EN): Translated")
         else:
             translated_title = novel_data['title']
             translated_description = novel_data['description']
@@ -313,8 +569,24 @@ class NovelCrawler:
         if story_result.get('existed'):
             self.log(f"  Story exists (ID: {story_id})")
             
-            # 🚀 OPTIMIZATION: Check if all chapters exist BEFORE downloading cover
-            chapter_status = self.wordpress.get_story_chapter_status(story_id, len(novel_data['chapters']))
+            # OPTIMIZATION: A known story is answered from the local chapter index (no round trip)
+            local_index = self.file_manager.get_local_chapter_cache(story_id) if self.chapter_index_enabled else None
+            if self.chapter_index_enabled:
+                self.metrics.inc('cache_lookups_total', cache='chapter_index',
+                                 outcome='hit' if local_index is not None else 'miss')
+            if local_index is not None:
+                self.log(f"  Using local chapter index ({len(local_index)} chapters in {len(local_index.ranges)} ranges)")
+                chapter_status = {
+                    'success': True,
+                    'chapters_count': len(local_index),
+                    'is_complete': local_index.covers(1, len(novel_data['chapters'])),
+                    'existing_chapters': local_index
+                }
+            else:
+                # 🚀 OPTIMIZATION: Check if all chapters exist BEFORE downloading cover
+                chapter_status = self.wordpress.get_story_chapter_status(story_id, len(novel_data['chapters']))
+                if chapter_status['success'] and self.chapter_index_enabled:
+                    self.file_manager.update_local_chapter_cache(story_id, chapter_status['existing_chapters'])
             
             if chapter_status['success'] and chapter_status['is_complete']:
                 self.log(f"  ✓✓✓ NOVEL COMPLETE! All {chapter_status['chapters_count']} chapters exist - SKIPPING! ✓✓✓")
@@ -322,27 +594,31 @@ class NovelCrawler:
                 self.file_manager.update_novel_progress(novel_url, 'completed', 
                     chapters_crawled=len(novel_data['chapters']),
                     chapters_total=len(novel_data['chapters']),
-                    story_id=story_id)
+                    story_id=story_id,
+                    markers=markers)
                 return
             else:
                 self.log(f"  Novel incomplete ({chapter_status['chapters_count']}/{len(novel_data['chapters'])} chapters) - continuing...")
                 # Store chapter status for later use to avoid re-checking
-                existing_chapter_set = set(chapter_status.get('existing_chapters', []))
+                existing_chapters = chapter_status.get('existing_chapters', [])
+                existing_chapter_set = existing_chapters if local_index is not None else set(existing_chapters)
         else:
             self.log(f"  Story created (ID: {story_id})")
             existing_chapter_set = set()  # New story, no chapters exist
+            if self.chapter_index_enabled:
+                self.file_manager.update_local_chapter_cache(story_id, [])
         
         # Only download cover if we're processing chapters
         self.log("\n[5/6] Downloading cover...")
-        # Download cover image if available
+        # Download cover image if available - in the background, chapters never wait for it
         cover_path = None
         if novel_data['cover_url']:
-            try:
-                cover_filename = self.file_manager.download_cover(novel_id, novel_data['cover_url'])
-                cover_path = os.path.join('novels', f'novel_{novel_id}', cover_filename)
-                self.log(f"  Cover downloaded: {cover_filename}")
-            except Exception as e:
-                self.log(f"  Failed to download cover: {e}")
+            self.cover_prefetcher.submit(novel_id, novel_data['cover_url'])
+            self.log("  Cover download queued")
+            # The story update below carries the cover already on disk (from an earlier run, if any)
+            local_cover = self.file_manager.cover_path(novel_id, novel_data['cover_url'])
+            if os.path.exists(local_cover):
+                cover_path = local_cover
         
         # Save metadata
         metadata = {
@@ -373,10 +649,13 @@ class NovelCrawler:
         self.wordpress.create_story(story_data_final)
         
         # Step 6: Process chapters
-        self.log(f"\n[6/6] Processing chapters (max {self.max_chapters}, batches of {self.bulk_chapter_size})...")
+        self.log(f"\n[6/6] Processing chapters (max {self.max_chapters}, batches of up to {self.bulk_chapter_size})...")
         
         # Create chapter directories
         self.file_manager.create_directories(novel_id)
+        # OPTIMIZATION: Manifest of saved chapter files - resumed chapters are served from disk
+        # (no refetch, no re-parsing, no per-chapter directory lookups)
+        manifest = self.file_manager.load_chapter_manifest(novel_id)
         
         # Store novel titles for chapter filenames
         novel_title_raw = novel_data['title']
@@ -408,121 +687,174 @@ class NovelCrawler:
         else:
             self.log(f"  Using cached chapter status (avoids API call)")
         
-        # PHASE 1: Crawl and translate all chapters (sequential to maintain order)
-        self.log(f"\n  Phase 1: Crawling & translating chapters...")
-        prepared_chapters = []  # List to store prepared chapter data in order
+        # PHASE 1 + 2: Streaming pipeline (fetch -> translate/save -> bulk upload)
+        # Chapter pages are fetched by a bounded worker pool, but results are
+        # consumed strictly in chapter_number order to keep translation/saving sequential.
+        # Prepared chapters flow through a bounded queue to a background uploader that
+        # sends each batch as soon as it fills, so memory stays flat for any novel length.
+        self.log(f"\n  Phase 1: Crawling & translating chapters ({self.fetch_workers} fetch workers)...")
+        self.log(f"  Phase 2: Uploading to WordPress in background batches of up to {self.bulk_chapter_size} chapters / "
+                 f"{self.batch_sizer.target_bytes / 1024:.0f} KB")
         chapters_existed = 0
+        total_chapters = len(novel_data['chapters'])
+        batch_counter = [0]
+        log_tag = getattr(self._log_context, 'tag', None)
+        
+        def upload_batch(batch):
+            # Runs on the uploader thread - keep this novel's log tag
+            self._log_context.tag = log_tag
+            batch_counter[0] += 1
+            return self.upload_chapter_batch(batch, story_id, novel_url, total_chapters, label=str(batch_counter[0]))
+        
+        uploader = ChapterUploader(upload_batch, self.bulk_chapter_size, delay=self.delay, sizer=self.batch_sizer).start()
+        
+        def chapters_to_fetch():
+            """Yield (chapter_number, chapter) pairs that still need crawling"""
+            nonlocal chapters_existed
+            for idx, chapter in enumerate(chapters_to_process, start=start_chapter):
+                # Check if chapter exists (use bulk result if available)
+                if existing_chapter_set is not None:
+                    if idx in existing_chapter_set:
+                        self.log(f"\n  Chapter {idx}/{len(novel_data['chapters'])}: {chapter['title']}", rate_limit='chapter', chapter=idx)
+                        self.log(f"    ✓ Already in WordPress - Skipped crawl/translate", 'debug', chapter=idx)
+                        chapters_existed += 1
+                        continue
+                else:
+                    # Fallback to individual check
+                    chapter_check = self.wordpress.check_chapter_exists(story_id, idx)
+                    if chapter_check['exists']:
+                        if self.chapter_index_enabled:
+                            self.file_manager.add_chapter_to_cache(story_id, idx)
+                        self.log(f"\n  Chapter {idx}/{len(novel_data['chapters'])}: {chapter['title']}", rate_limit='chapter', chapter=idx)
+                        self.log(f"    ✓ Already in WordPress (ID: {chapter_check['chapter_id']}) - Skipped crawl/translate", 'debug', chapter=idx)
+                        chapters_existed += 1
+                        continue
+                yield idx, chapter
+        
+        def fetch_chapter(item):
+            """Fetch and parse one chapter page (runs on a pool worker)"""
+            idx, chapter = item
+            saved = manifest.read(idx, 'raw', url=chapter['url'])
+            self.metrics.inc('cache_lookups_total', cache='chapter_manifest', kind='raw', outcome='hit' if saved else 'miss')
+            if saved:
+                return saved[0], saved[1], True
+            with self.metrics.timer('parse_chapter_page'):
+                title, content = self.parser.parse_chapter_page(chapter['url'])
+            return title, content, False
+        
+        translating = bool(self.should_translate and self.translator and self.translator.client)
+        
+        def translate_fetched(item):
+            """
+            Look up a saved translation of a fetched chapter, or translate it (runs on a pool worker).
+            Returns (saved translation, translation): the translation is a (title, content)
+            pair, the exception that stopped it, or None when not translating.
+            """
+            self._log_context.tag = log_tag
+            (idx, chapter), (title, content, raw_saved) = item
+            if not content:
+                return None, None
+            saved_translation = manifest.read(idx, 'translated', source_sha256=content_hash(content))
+            self.metrics.inc('cache_lookups_total', cache='chapter_manifest', kind='translated',
+                             outcome='hit' if saved_translation else 'miss')
+            if saved_translation or not translating:
+                return saved_translation, None
+            # Retries and backoff happen per request inside the translator,
+            # paced by its shared rate controller
+            try:
+                # Title is packed into the content's request instead of costing its own
+                with self.metrics.timer('translate'):
+                    return None, self.translator.translate_chapter(title, content)
+            except Exception as e:
+                return None, e
         
-        for idx, chapter in enumerate(chapters_to_process, start=start_chapter):
-            self.log(f"\n  Chapter {idx}/{len(novel_data['chapters'])}: {chapter['title']}")
-            
-            # Check if chapter exists (use bulk result if available)
-            if existing_chapter_set is not None:
-                if idx in existing_chapter_set:
-                    self.log(f"    ✓ Already in WordPress - Skipped crawl/translate")
-                    chapters_existed += 1
-                    continue
-            else:
-                # Fallback to individual check
-                chapter_check = self.wordpress.check_chapter_exists(story_id, idx)
-                if chapter_check['exists']:
-                    self.log(f"    ✓ Already in WordPress (ID: {chapter_check['chapter_id']}) - Skipped crawl/translate")
-                    chapters_existed += 1
+        fetched_chapters = ordered_map(fetch_chapter, chapters_to_fetch(), self.fetch_workers)
+        # OPTIMIZATION: Chapters are translated in a bounded window ahead of the consumer,
+        # so chunks of consecutive chapters overlap; results are still consumed in chapter order
+        prepared_chapters = ordered_map(translate_fetched, fetched_chapters,
+                                        self.translator.max_in_flight if translating else 1)
+        # Phase 1 overlaps with the background uploads of full batches; Phase 2 is the final flush
+        crawl_phase = self.start_profile_phase('phase1_crawl_translate')
+        
+        try:
+            for ((idx, chapter), (title, content, raw_saved)), (saved_translation, translation) in prepared_chapters:
+                self.log(f"\n  Chapter {idx}/{len(novel_data['chapters'])}: {chapter['title']}", rate_limit='chapter', chapter=idx)
+                
+                if not content:
+                    self.log("    Skipped (no content found)", 'warning', chapter=idx)
                     continue
-            
-            # Parse chapter content
-            title, content = self.parser.parse_chapter_page(chapter['url'])
-            if not content:
-                self.log("    Skipped (no content found)")
-                continue
-            
-            self.log(f"    Extracted {len(content)} characters")
-            
-            # Save raw chapter
-            raw_filename = self.file_manager.save_chapter(novel_id, idx, title, content, novel_title_raw, is_translated=False)
-            self.log(f"    Saved to {raw_filename}")
-            
-            # Translate if enabled
-            if self.should_translate and self.translator and self.translator.client:
-                # Check if translated file already exists
-                translated_dir = os.path.join('novels', f'novel_{novel_id}', 'chapters_translated')
-                safe_novel_name = novel_title_translated.replace(' ', '_').replace('/', '_').replace('\\', '_')[:50]
-                translated_filepath = os.path.join(translated_dir, f"{safe_novel_name}_Chapter_{idx:03d}.html")
                 
-                if os.path.exists(translated_filepath):
-                    # Read existing translation
-                    with open(translated_filepath, 'r', encoding='utf-8') as f:
-                        translated_html = f.read()
-                        # Extract title and content from HTML
-                        import re
-                        title_match = re.search(r'<h1>(.*?)</h1>', translated_html, re.DOTALL)
-                        translated_title = title_match.group(1) if title_match else title
-                        content_match = re.search(r'</h1>\s*(.+)', translated_html, re.DOTALL)
-                        translated_content = content_match.group(1).strip() if content_match else content
-                    self.log(f"    Using cached translation")
+                self.log(f"    Extracted {len(content)} characters", 'debug', chapter=idx, characters=len(content))
+                
+                # Save raw chapter
+                if raw_saved:
+                    raw_sha256 = manifest.get(idx, 'raw')['sha256']
+                    self.log(f"    Using saved raw chapter", 'debug', chapter=idx)
                 else:
-                    # Retry translation with exponential backoff
-                    max_retries = 10
-                    retry_delay = 0
-                    translated_title = None
-                    translated_content = None
-                    
-                    for attempt in range(max_retries):
-                        try:
-                            if attempt > 0:
-                                self.log(f"    Translation retry {attempt}/{max_retries} (waiting {retry_delay}s)...")
-                                time.sleep(retry_delay)
-                            
-                            translated_title = self.translator.translate(title)
-                            translated_content = self.translator.translate(content)
-                            self.log(f"    Translated")
-                            break
-                        except Exception as e:
-                            self.log(f"    Translation error: {e}")
-                            if attempt < max_retries - 1:
-                                retry_delay = min(600, 2 ** attempt)  # Max 10 minutes
-                            else:
-                                self.log(f"    CRITICAL: Translation failed after {max_retries} attempts")
-                                self.log(f"    STOPPING: Cannot proceed without translation for chapter {idx}")
-                                return
-                    
-                    if not translated_title or not translated_content:
-                        self.log(f"    CRITICAL: Translation failed for chapter {idx}")
-                        self.log(f"    STOPPING: Cannot proceed without translation")
-                        return
-            else:
-                translated_title = title
-                translated_content = content
-            
-            # Save translated chapter
-            translated_filename = self.file_manager.save_chapter(novel_id, idx, translated_title, translated_content, novel_title_translated, is_translated=True)
-            self.log(f"    Saved to {translated_filename}")
-            
-            # Prepare chapter data for batch creation (maintain order)
-            chapter_wordpress_title = f"{novel_title_translated} Chapter {idx}"
-            chapter_data = {
-                'title': chapter_wordpress_title,
-                'title_zh': title,
-                'content': translated_content,
-                'story_id': story_id,
-                'url': chapter['url'],
-                'chapter_number': idx  # CRITICAL: ensures sequential order
-            }
-            prepared_chapters.append(chapter_data)
-            self.log(f"    ✓ Prepared for batch upload")
-        
-        # PHASE 2: Batch upload to WordPress (maintains sequential order)
-        if prepared_chapters:
-            self.log(f"\n  Phase 2: Uploading {len(prepared_chapters)} chapters to WordPress...")
-            chapters_created, chapters_uploaded_existed = self.process_chapters_in_batches(
-                prepared_chapters, story_id, novel_url, len(novel_data['chapters'])
-            )
-        else:
-            chapters_created = 0
-            chapters_uploaded_existed = 0
+                    with self.metrics.timer('save_chapter'):
+                        raw_filename = self.file_manager.save_chapter(novel_id, idx, title, content, novel_title_raw, is_translated=False)
+                        raw_sha256 = manifest.record(idx, 'raw', raw_filename, title, content, url=chapter['url'])
+                    self.log(f"    Saved to {raw_filename}", 'debug', chapter=idx)
+                
+                # Translate if enabled
+                if translating:
+                    if saved_translation:
+                        translated_title, translated_content = saved_translation
+                        self.log(f"    Using cached translation", 'debug', chapter=idx)
+                    else:
+                        if isinstance(translation, Exception):
+                            self.log(f"    Translation error: {translation}", 'error', chapter=idx)
+                            self.log(f"    CRITICAL: Translation failed after {self.translator.max_attempts} attempts", 'critical', chapter=idx)
+                            self.log(f"    STOPPING: Cannot proceed without translation for chapter {idx}", 'critical', chapter=idx)
+                            return
+                        translated_title, translated_content = translation
+                        self.log(f"    Translated", 'debug', chapter=idx)
+                        
+                        if not translated_title or not translated_content:
+                            self.log(f"    CRITICAL: Translation failed for chapter {idx}", 'critical', chapter=idx)
+                            self.log(f"    STOPPING: Cannot proceed without translation", 'critical', chapter=idx)
+                            return
+                else:
+                    translated_title = title
+                    translated_content = content
+                
+                # Save translated chapter
+                if saved_translation != (translated_title, translated_content):
+                    with self.metrics.timer('save_chapter'):
+                        translated_filename = self.file_manager.save_chapter(novel_id, idx, translated_title, translated_content, novel_title_translated, is_translated=True)
+                        manifest.record(idx, 'translated', translated_filename, translated_title, translated_content,
+                                        url=chapter['url'], source_sha256=raw_sha256)
+                    self.log(f"    Saved to {translated_filename}", 'debug', chapter=idx)
+                
+                # Prepare chapter data for batch creation (maintain order)
+                chapter_wordpress_title = f"{novel_title_translated} Chapter {idx}"
+                chapter_data = {
+                    'title': chapter_wordpress_title,
+                    'title_zh': title,
+                    'content': translated_content,
+                    'story_id': story_id,
+                    'url': chapter['url'],
+                    'chapter_number': idx  # CRITICAL: ensures sequential order
+                }
+                uploader.submit(chapter_data)
+                self.log(f"    ✓ Queued for batch upload", 'debug', chapter=idx)
+        finally:
+            # Stop translating and fetching, then flush the last partial batch (uploads everything prepared so far)
+            prepared_chapters.close()
+            fetched_chapters.close()
+            manifest.flush()
+            self.file_manager.close_chapter_storage(novel_id)
+            self.end_profile_phase(crawl_phase)
+            upload_phase = self.start_profile_phase('phase2_upload')
+            chapters_created, chapters_uploaded_existed = uploader.close()
+            self.end_profile_phase(upload_phase)
         
         # Determine if novel is completed or just reached max_chapters limit
-        total_chapters_crawled = chapters_created + chapters_existed + chapters_uploaded_existed
+        # Chapters before resume_from_chapter were processed by earlier runs
+        total_chapters_crawled = min(
+            resume_from_chapter + chapters_created + chapters_existed + chapters_uploaded_existed,
+            len(novel_data['chapters'])
+        )
         if total_chapters_crawled >= len(novel_data['chapters']):
             # All chapters processed - mark as completed
             status = 'completed'
@@ -536,7 +868,8 @@ class NovelCrawler:
             novel_url, status,
             chapters_crawled=total_chapters_crawled,
             chapters_total=len(novel_data['chapters']),
-            story_id=story_id
+            story_id=story_id,
+            markers=markers if status == 'completed' else None
         )
         
         # Summary
@@ -547,23 +880,82 @@ class NovelCrawler:
         self.log(f"Chapters created (new): {chapters_created}")
         self.log(f"Chapters existed (skipped): {chapters_existed + chapters_uploaded_existed}")
         self.log(f"Total processed: {chapters_created + chapters_existed + chapters_uploaded_existed}")
+        if self.page_cache:
+            cache_stats = self.page_cache.stats
+            self.log(f"Page cache: {cache_stats['hits']} hits, {cache_stats['revalidated']} revalidated (304), {cache_stats['misses']} fetched")
+        if manifest.stats['raw_hits'] or manifest.stats['translated_hits']:
+            self.log(f"Chapter manifest: {manifest.stats['raw_hits']} raw chapters and "
+                     f"{manifest.stats['translated_hits']} translations served from disk")
+        if self.translator and self.translator.memory:
+            memory_stats = self.translator.memory.stats
+            self.log(f"Translation memory: {memory_stats['hits']} hits, {memory_stats['misses']} misses")
+        if self.translator:
+            self.log(f"Translation requests: {self.translator.stats['requests']} sent, {self.translator.stats['requests_saved']} saved by packing, "
+                     f"{self.translator.stats['untranslated']} untranslated responses retried")
+            self.log(f"Translation rate: {self.translator.rate_controller.rate:.2f} req/s")
+        compression = dict(self.wordpress.compression_stats)
+        if compression['requests']:
+            saved = compression['raw_bytes'] - compression['sent_bytes']
+            self.log(f"Upload compression: {compression['requests']} gzip requests, "
+                     f"{compression['raw_bytes'] / 1024:.0f} KB -> {compression['sent_bytes'] / 1024:.0f} KB "
+                     f"({saved / compression['raw_bytes']:.0%} saved), {compression['seconds']:.1f}s uploading")
         self.log("")
+    
+    def finish_covers(self):
+        """Wait for queued background cover downloads (end of run) and log their outcome"""
+        self.cover_prefetcher.close()
+        cover_stats = dict(self.cover_prefetcher.stats)
+        if any(cover_stats.values()):
+            self.log(f"Covers: {cover_stats['downloaded']} downloaded, {cover_stats['unchanged']} unchanged (304), "
+                     f"{cover_stats['failed']} failed")
+    
+    def write_metrics(self):
+        """
+        Write this run's metrics as JSON and as a Prometheus textfile
+        (metrics_json_path / metrics_prometheus_path) and log the per-stage latencies
+        """
+        if not self.config.get('metrics_enabled', True):
+            return
+        json_path = self.config.get('metrics_json_path', 'metrics.json')
+        prometheus_path = self.config.get('metrics_prometheus_path', 'metrics.prom')
+        try:
+            self.metrics.write(json_path, prometheus_path)
+        except OSError as e:
+            self.log(f"Failed to write metrics: {e}", 'warning')
+            return
+        
+        summary = self.metrics.summary_lines()
+        if summary:
+            self.log("Stage latencies:")
+            for line in summary:
+                self.log(line)
+        for cache, rate in self.metrics.cache_hit_rates().items():
+            if rate is not None:
+                self.log(f"  {cache} cache hit rate: {rate:.0%}")
+        self.log(f"Metrics written to {', '.join(path for path in (json_path, prometheus_path) if path)}")
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python crawler.py <url> [max_pages]")
+    # --profile writes cProfile/tracemalloc/stack reports to profile_dir
+    args = [arg for arg in sys.argv[1:] if arg != '--profile']
+    profile = len(args) < len(sys.argv) - 1
+    if not args:
+        print("Usage: python crawler.py <url> [max_pages] [--profile]")
         print("\nExamples:")
         print("  Novel:    python crawler.py https://www.xbanxia.cc/books/396941.html")
         print("  Category: python crawler.py https://www.xbanxia.cc/list/1_1.html")
         print("  Category: python crawler.py https://www.xbanxia.cc/list/1_1.html 5")
+        print("  Profile:  python crawler.py https://www.xbanxia.cc/books/396941.html --profile")
         sys.exit(1)
     
-    url = sys.argv[1]
-    max_pages = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    url = args[0]
+    max_pages = int(args[1]) if len(args) > 1 else None
     
+    crawler = None
     try:
         crawler = NovelCrawler()
+        if profile:
+            crawler.start_profiling()
         
         # Detect URL type and call appropriate method
         if '/list/' in url:
@@ -578,10 +970,20 @@ def main():
             sys.exit(1)
             
     except Exception as e:
-        print(f"Error: {e}")
-        import traceback
-        traceback.print_exc()
+        if crawler:
+            crawler.log(f"Error: {e}", 'error', exc_info=True)
+        else:
+            # Failed before the crawler's logger existed
+            print(f"Error: {e}")
+            import traceback
+            traceback.print_exc()
         sys.exit(1)
+    finally:
+        # Failed runs are the ones most worth comparing
+        if crawler:
+            crawler.finish_covers()
+            crawler.stop_profiling()
+            crawler.write_metrics()
 
 
 if __name__ == '__main__':
@@ -4,13 +4,34 @@ File management for novel content
 
 import os
 import json
+import atexit
+import threading
 import requests
 from urllib.parse import urlparse
 
+from chapter_archive import PACK_NAME, ChapterArchive, chapter_filename
+from chapter_index import ChapterRanges
+from chapter_manifest import ChapterManifest
+from state_store import WriteBehindState, open_state_store
+
 
 class FileManager:
-    def __init__(self, logger):
+    def __init__(self, logger, state_backend='sqlite', flush_interval=5.0, flush_every=50, chapter_storage='files'):
         self.logger = logger
+        # OPTIMIZATION: 'archive' packs a novel's chapters into one compressed file
+        # instead of two small HTML files per chapter ('files')
+        self.chapter_storage = chapter_storage
+        self._archives = {}
+        self._archives_lock = threading.Lock()
+        # Serializes read-modify-write state updates between novel worker threads
+        self._state_lock = threading.RLock()
+        # OPTIMIZATION: Per-row SQLite upserts instead of rewriting crawler_state.json,
+        # behind a process-resident state that flushes dirty entries in the background
+        self.state_store = WriteBehindState(
+            open_state_store(state_backend, logger),
+            flush_interval=flush_interval, flush_every=flush_every, logger=logger
+        )
+        atexit.register(self.close)
     
     def save_metadata(self, novel_id, metadata):
         """Save novel metadata to JSON file"""
@@ -24,9 +45,16 @@ class FileManager:
         return filepath
     
     def save_chapter(self, novel_id, chapter_number, title, content, novel_name='', is_translated=False):
-        """Save chapter content to HTML file"""
+        """
+        Save chapter content as HTML. Returns its location relative to the
+        novel directory (chapters_raw/<file>.html, or chapters.pack when archived)
+        """
         novel_dir = os.path.join('novels', f'novel_{novel_id}')
         
+        if self.chapter_storage == 'archive':
+            self.chapter_archive(novel_id).put(chapter_number, 'translated' if is_translated else 'raw', f"<h1>{title}</h1>\n\n{content}")
+            return PACK_NAME
+        
         if is_translated:
             chapters_dir = os.path.join(novel_dir, 'chapters_translated')
         else:
@@ -35,14 +63,37 @@ class FileManager:
         os.makedirs(chapters_dir, exist_ok=True)
         
         # Format: NovelName_Chapter_001.html
-        safe_novel_name = novel_name.replace(' ', '_').replace('/', '_').replace('\\', '_')[:50]
-        filename = f"{safe_novel_name}_Chapter_{chapter_number:03d}.html"
+        filename = chapter_filename(novel_name, chapter_number)
         filepath = os.path.join(chapters_dir, filename)
         
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(f"<h1>{title}</h1>\n\n{content}")
         
-        return filename
+        return os.path.join(os.path.basename(chapters_dir), filename)
+    
+    def chapter_archive(self, novel_id):
+        """The novel's chapter archive (opened once, kept until close_chapter_storage)"""
+        with self._archives_lock:
+            archive = self._archives.get(novel_id)
+            if archive is None:
+                archive = self._archives[novel_id] = ChapterArchive(os.path.join('novels', f'novel_{novel_id}'))
+            return archive
+    
+    def close_chapter_storage(self, novel_id):
+        """Release the novel's open archive (end of crawl_novel)"""
+        with self._archives_lock:
+            archive = self._archives.pop(novel_id, None)
+        if archive is not None:
+            archive.close()
+    
+    def load_chapter_manifest(self, novel_id):
+        """Chapter manifest of a novel (chapter number -> saved raw/translated files)"""
+        novel_dir = os.path.join('novels', f'novel_{novel_id}')
+        # Archived entries stay readable after switching chapter_storage back to files
+        archive = None
+        if self.chapter_storage == 'archive' or os.path.exists(os.path.join(novel_dir, PACK_NAME)):
+            archive = self.chapter_archive(novel_id)
+        return ChapterManifest.load(novel_dir, archive=archive, logger=self.logger)
     
     def create_directories(self, novel_id):
         """Create directory structure for novel"""
@@ -50,78 +101,114 @@ class FileManager:
         chapters_raw_dir = os.path.join(novel_dir, 'chapters_raw')
         chapters_translated_dir = os.path.join(novel_dir, 'chapters_translated')
         
+        if self.chapter_storage == 'archive':
+            os.makedirs(novel_dir, exist_ok=True)
+            return chapters_raw_dir, chapters_translated_dir
+        
         os.makedirs(chapters_raw_dir, exist_ok=True)
         os.makedirs(chapters_translated_dir, exist_ok=True)
         
         return chapters_raw_dir, chapters_translated_dir
     
-    def download_cover(self, novel_id, cover_url):
-        """Download cover image from URL"""
-        novel_dir = os.path.join('novels', f'novel_{novel_id}')
-        os.makedirs(novel_dir, exist_ok=True)
-        
+    def cover_path(self, novel_id, cover_url):
+        """Local path of a novel's cover (novels/novel_<id>/cover<ext>)"""
         # Get file extension from URL
         parsed_url = urlparse(cover_url)
         ext = os.path.splitext(parsed_url.path)[1] or '.jpg'
-        filename = f'cover{ext}'
-        filepath = os.path.join(novel_dir, filename)
+        return os.path.join('novels', f'novel_{novel_id}', f'cover{ext}')
+    
+    def download_cover(self, novel_id, cover_url, session=None):
+        """
+        Download cover image from URL. Returns (filename, downloaded).
+        An existing cover is revalidated with the ETag/Last-Modified of its
+        last download; a 304 keeps the local file (downloaded=False).
+        """
+        filepath = self.cover_path(novel_id, cover_url)
+        filename = os.path.basename(filepath)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        
+        validators_key = f'cover:{novel_id}'
+        validators = self.state_store.get_value(validators_key) or {}
+        headers = {}
+        if os.path.exists(filepath) and validators.get('url') == cover_url:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
         
         # Download image
-        response = requests.get(cover_url, timeout=30)
+        response = (session or requests).get(cover_url, headers=headers, timeout=30)
+        if headers and response.status_code == 304:
+            return filename, False
         response.raise_for_status()
         
-        with open(filepath, 'wb') as f:
+        temp_path = f"{filepath}.tmp"
+        with open(temp_path, 'wb') as f:
             f.write(response.content)
+        os.replace(temp_path, filepath)
+        self.state_store.set_value(validators_key, {
+            'url': cover_url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        })
         
-        return filename
-    
-    def load_crawler_state(self):
-        """Load crawler state from JSON file"""
-        state_file = 'crawler_state.json'
-        if os.path.exists(state_file):
-            with open(state_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {'processed_novels': {}, 'last_category_page': None}
-    
-    def save_crawler_state(self, state):
-        """Save crawler state to JSON file"""
-        state_file = 'crawler_state.json'
-        with open(state_file, 'w', encoding='utf-8') as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
-    
-    def update_novel_progress(self, novel_url, status, chapters_crawled=0, chapters_total=0, story_id=None):
-        """Update progress for a specific novel"""
-        state = self.load_crawler_state()
+        return filename, True
+    
+    def get_novel_progress(self, novel_url):
+        """Get progress for a single novel (empty dict if never seen)"""
+        return self.state_store.get_novel(novel_url) or {}
+    
+    def update_novel_progress(self, novel_url, status, chapters_crawled=0, chapters_total=0, story_id=None, markers=None):
+        """
+        Update progress for a specific novel
+        markers: source update markers (latest chapter, update date, chapter count)
+        used to skip unchanged novels; kept from the previous entry when not given
+        """
         import datetime
-        state['processed_novels'][novel_url] = {
+        entry = {
             'status': status,  # 'in_progress', 'completed', 'failed'
             'chapters_crawled': chapters_crawled,
             'chapters_total': chapters_total,
             'story_id': story_id,
             'last_updated': datetime.datetime.now().isoformat()
         }
-        self.save_crawler_state(state)
+        with self._state_lock:
+            if markers is None:
+                markers = self.get_novel_progress(novel_url).get('markers')
+            if markers:
+                entry['markers'] = markers
+            self.state_store.upsert_novel(novel_url, entry)
+    
+    def set_last_category_page(self, page_url):
+        """Record the last processed category page"""
+        self.state_store.set_value('last_category_page', page_url)
+    
+    def close(self):
+        """Flush pending state and close the backend"""
+        self.state_store.close()
+        for novel_id in list(self._archives):
+            self.close_chapter_storage(novel_id)
     
     def get_local_chapter_cache(self, story_id):
-        """Get cached chapter numbers for a story (avoids WordPress API calls)"""
-        state = self.load_crawler_state()
-        cache_key = f'story_{story_id}_chapters'
-        return state.get('chapter_cache', {}).get(cache_key, set())
+        """
+        Chapters known to exist in WordPress for a story (chapter_index.ChapterRanges),
+        or None if the story has no index yet. Consulted before any WordPress existence check.
+        """
+        ranges = self.state_store.get_value(f'chapter_index:{story_id}')
+        return ChapterRanges(ranges) if ranges is not None else None
     
     def update_local_chapter_cache(self, story_id, chapter_numbers):
-        """Update local cache of chapter numbers for a story"""
-        state = self.load_crawler_state()
-        if 'chapter_cache' not in state:
-            state['chapter_cache'] = {}
-        cache_key = f'story_{story_id}_chapters'
-        # Convert set to list for JSON serialization
-        if isinstance(chapter_numbers, set):
-            chapter_numbers = list(chapter_numbers)
-        state['chapter_cache'][cache_key] = chapter_numbers
-        self.save_crawler_state(state)
+        """Replace a story's index (e.g. with WordPress' existing_chapters)"""
+        with self._state_lock:
+            self.state_store.set_value(f'chapter_index:{story_id}', ChapterRanges.from_numbers(chapter_numbers).to_list())
+    
+    def add_chapters_to_cache(self, story_id, chapter_numbers):
+        """Add uploaded chapters to a story's index"""
+        with self._state_lock:
+            index = self.get_local_chapter_cache(story_id) or ChapterRanges()
+            index.add_many(chapter_numbers)
+            self.state_store.set_value(f'chapter_index:{story_id}', index.to_list())
     
     def add_chapter_to_cache(self, story_id, chapter_number):
         """Add a single chapter to the cache"""
-        cached = set(self.get_local_chapter_cache(story_id))
-        cached.add(chapter_number)
-        self.update_local_chapter_cache(story_id, cached)
+        self.add_chapters_to_cache(story_id, [chapter_number])
@@ -0,0 +1,135 @@
+"""
+Persistent HTTP response cache for source pages
+"""
+
+import atexit
+import sqlite3
+import threading
+import time
+import zlib
+
+from sqlite_lru import evict_lru
+
+
+# Seconds a cached page is served without contacting the server, per page type.
+# Chapter pages almost never change; novel (TOC) and category pages change often,
+# so they are revalidated with ETag/Last-Modified (a 304 costs no body transfer).
+DEFAULT_TTLS = {
+    'chapter': 30 * 24 * 3600,
+    'novel': 600,
+    'category': 300,
+}
+
+
+class ResponseCache:
+    """
+    On-disk response cache keyed by URL (SQLite, bodies zlib-compressed).
+    Stores ETag/Last-Modified for conditional revalidation and evicts the
+    least recently used entries once the total body size exceeds max_bytes.
+    """
+
+    def __init__(self, path='http_cache.db', max_bytes=200 * 1024 * 1024, ttls=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                page_type TEXT,
+                body BLOB,
+                size INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                last_access REAL
+            )''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+        self._conn.commit()
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        self._closed = False
+        atexit.register(self.close)
+
+    def get(self, url):
+        """Cached entry for url, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT page_type, body, etag, last_modified, fetched_at FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'page_type': row[0],
+            'content': zlib.decompress(row[1]),
+            'etag': row[2],
+            'last_modified': row[3],
+            'fetched_at': row[4],
+        }
+
+    def record(self, outcome):
+        """Count a lookup outcome ('hits', 'revalidated' or 'misses')"""
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def is_fresh(self, entry, page_type):
+        """True if entry may be served without revalidation"""
+        return time.time() - entry['fetched_at'] < self.ttls.get(page_type, 0)
+
+    def conditional_headers(self, entry):
+        """Request headers for revalidating a cached entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, page_type, content, etag=None, last_modified=None):
+        """Store a fresh response body"""
+        body = zlib.compress(content)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+            self._conn.execute(
+                '''INSERT OR REPLACE INTO responses
+                   (url, page_type, body, size, etag, last_modified, fetched_at, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                (url, page_type, body, len(body), etag, last_modified, now, now)
+            )
+            self._total_bytes += len(body) - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def touch(self, url):
+        """Mark an entry revalidated (server replied 304 Not Modified)"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('UPDATE responses SET fetched_at = ?, last_access = ? WHERE url = ?', (now, now, url))
+            self._conn.commit()
+
+    def mark_used(self, url):
+        """Record a local hit for LRU ordering"""
+        with self._lock:
+            self._conn.execute('UPDATE responses SET last_access = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes"""
+        evicted, freed = evict_lru(self._conn, 'responses', 'url', 'last_access',
+                                   self._total_bytes - self.max_bytes * 0.9)
+        self._total_bytes -= freed
+        self.stats['evicted'] += evicted
+
+    def close(self):
+        """Checkpoint the WAL into the cache file and close it"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            self._conn.close()
@@ -0,0 +1,232 @@
+"""
+Run metrics: per-stage latency histograms and counters
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Latency histogram bucket upper bounds (seconds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 180, math.inf)
+
+# Prometheus metric name prefix
+PREFIX = 'crawler_'
+
+HELP = {
+    'stage_seconds': 'Time spent per pipeline stage',
+    'requests_total': 'Requests sent, by host and status',
+    'bytes_received_total': 'Response bytes received, by host',
+    'bytes_sent_total': 'Request bytes sent, by host',
+    'bytes_saved_total': 'Request bytes saved by gzip compression, by host',
+    'retries_total': 'Retried or fallback operations, by service and reason',
+    'cache_lookups_total': 'Cache lookups, by cache and outcome',
+    'chapters_total': 'Chapters uploaded, by outcome',
+}
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bucket bound holding the q-quantile (max for the last bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return self.max if bound == math.inf or bound > self.max else bound
+        return self.max
+
+
+class Metrics:
+    """
+    Thread-safe counters and latency histograms for one run.
+    Names are short ('requests_total'); labels are keyword arguments.
+    Written at the end of a run as JSON and as a Prometheus textfile.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """Record the duration of the block in the stage_seconds histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - start, stage=stage, **labels)
+
+    def request(self, host, status, sent=0, received=0):
+        """Count one request to a host ('translator' for the translation service) and its payload sizes"""
+        self.inc('requests_total', host=host, status=status)
+        if sent:
+            self.inc('bytes_sent_total', sent, host=host)
+        if received:
+            self.inc('bytes_received_total', received, host=host)
+
+    def counter(self, name, **labels):
+        """Sum of a counter over every label set matching labels"""
+        wanted = set((key, str(value)) for key, value in labels.items())
+        with self._lock:
+            return sum(value for (counter_name, counter_labels), value in self._counters.items()
+                       if counter_name == name and wanted <= set(counter_labels))
+
+    def snapshot(self):
+        """Plain dict of everything recorded so far"""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {
+                    'name': name, 'labels': dict(labels),
+                    'count': histogram.count, 'sum': round(histogram.sum, 6),
+                    'min': histogram.min, 'max': histogram.max,
+                    'p50': histogram.quantile(0.5), 'p95': histogram.quantile(0.95),
+                    'buckets': {('+Inf' if bound == math.inf else str(bound)): count
+                                for bound, count in zip(BUCKETS, histogram.counts)},
+                }
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+        return {
+            'started': self.started,
+            'duration_seconds': round(time.time() - self.started, 3),
+            'counters': counters,
+            'histograms': histograms,
+            'cache_hit_rates': self.cache_hit_rates(),
+        }
+
+    def cache_hit_rates(self):
+        """{cache: share of lookups served without a full fetch}"""
+        rates = {}
+        with self._lock:
+            lookups = {}
+            for (name, labels), value in self._counters.items():
+                if name != 'cache_lookups_total':
+                    continue
+                labels = dict(labels)
+                totals = lookups.setdefault(labels.get('cache'), {'hit': 0, 'total': 0})
+                totals['total'] += value
+                if labels.get('outcome') in ('hit', 'revalidated'):
+                    totals['hit'] += value
+        for cache, totals in lookups.items():
+            rates[cache] = round(totals['hit'] / totals['total'], 4) if totals['total'] else None
+        return rates
+
+    def prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        snapshot = self.snapshot()
+
+        def label_text(labels, extra=None):
+            items = list(labels.items()) + list((extra or {}).items())
+            if not items:
+                return ''
+            escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+            return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + '}'
+
+        described = set()
+        for counter in snapshot['counters']:
+            name = PREFIX + counter['name']
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {HELP.get(counter['name'], counter['name'])}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{label_text(counter['labels'])} {counter['value']}")
+
+        for histogram in snapshot['histograms']:
+            name = PREFIX + histogram['name']
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {HELP.get(histogram['name'], histogram['name'])}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in histogram['buckets'].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{label_text(histogram['labels'], {'le': bound})} {cumulative}")
+            lines.append(f"{name}_sum{label_text(histogram['labels'])} {histogram['sum']}")
+            lines.append(f"{name}_count{label_text(histogram['labels'])} {histogram['count']}")
+
+        rates = [(cache, rate) for cache, rate in snapshot['cache_hit_rates'].items() if rate is not None]
+        if rates:
+            lines.append(f"# HELP {PREFIX}cache_hit_ratio Share of cache lookups served without a full fetch")
+            lines.append(f"# TYPE {PREFIX}cache_hit_ratio gauge")
+            for cache, rate in rates:
+                lines.append(f"{PREFIX}cache_hit_ratio{label_text({'cache': cache})} {rate}")
+        lines.append(f"# HELP {PREFIX}run_duration_seconds Wall time of the run")
+        lines.append(f"# TYPE {PREFIX}run_duration_seconds gauge")
+        lines.append(f"{PREFIX}run_duration_seconds {snapshot['duration_seconds']}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, json_path=None, prometheus_path=None):
+        """Write the JSON report and/or Prometheus textfile (atomically)"""
+        if json_path:
+            _atomic_write(json_path, json.dumps(self.snapshot(), indent=2))
+        if prometheus_path:
+            _atomic_write(prometheus_path, self.prometheus())
+
+    def summary_lines(self):
+        """Human readable per-stage summary"""
+        lines = []
+        for histogram in self.snapshot()['histograms']:
+            if histogram['name'] != 'stage_seconds':
+                continue
+            labels = dict(histogram['labels'])
+            label = labels.pop('stage')
+            if labels:
+                label += f" ({', '.join(f'{key}={value}' for key, value in labels.items())})"
+            lines.append(f"  {label:<40} {histogram['count']:>6}x  total {histogram['sum']:8.2f}s  "
+                         f"p50 {histogram['p50']:.3f}s  p95 {histogram['p95']:.3f}s")
+        return lines
+
+
+def _atomic_write(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
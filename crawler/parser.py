@@ -2,165 +2,286 @@
 HTML parser module for xbanxia.cc novels
 """
 
+import re
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import EncodingDetector
+from lxml import etree
+from lxml import html as lxml_html
+from urllib.parse import urljoin, urlparse
+
+from concurrency import HostLimiter
+from metrics import Metrics
+
+
+# Update dates shown in listings, e.g. 2025-11-05 or 2025/11/05 14:20
+DATE_PATTERN = re.compile(r'\d{4}[-/.]\d{1,2}[-/.]\d{1,2}(?:\s+\d{1,2}:\d{2}(?::\d{2})?)?')
+
+# OPTIMIZATION: Only the subtrees the parsers read are built into soup objects
+NOVEL_PAGE_STRAINER = SoupStrainer('div', class_=['book-intro', 'book-list'])
+CATEGORY_PAGE_STRAINER = SoupStrainer('div', class_=['pop-books2', 'pagelink'])
+
+# Chapter pages are parsed with lxml directly and precompiled XPath
+CHAPTER_TITLE_XPATH = etree.XPath('//h1[@id="nr_title"]')
+CHAPTER_CONTENT_XPATH = etree.XPath('//div[@id="nr1"]')
+# Text nodes BeautifulSoup's get_text() returns (it skips scripts, styles, templates and ruby annotations)
+TEXT_XPATH = etree.XPath(
+    './/text()[not(ancestor::script or ancestor::style or ancestor::template or ancestor::rt or ancestor::rp)]'
+)
 
 
 class NovelParser:
-    def __init__(self, logger):
+    def __init__(self, logger, host_limiter=None, pool_size=10, cache=None, metrics=None):
         self.logger = logger
+        # Optional persistent response cache (http_cache.ResponseCache)
+        self.cache = cache
+        self.metrics = metrics or Metrics()
+        # Shared limiter caps concurrent requests per source host
+        self.host_limiter = host_limiter or HostLimiter()
         self.session = requests.Session()
+        # Pool sized for concurrent chapter fetches (keep-alive per worker)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
     
-    def parse_novel_page(self, url):
-        """Parse novel page to extract metadata and chapter list"""
-        response = self.session.get(url)
-        response.encoding = 'utf-8'
-        soup = BeautifulSoup(response.content, 'lxml')
+    def _get(self, url, page_type):
+        """
+        GET a page body while holding a per-host request slot.
+        With a response cache, fresh entries are served locally and stale
+        ones are revalidated with ETag/Last-Modified (304 = reuse cached body).
+        """
+        entry = self.cache.get(url) if self.cache else None
+        if entry and self.cache.is_fresh(entry, page_type):
+            self.cache.record('hits')
+            self.metrics.inc('cache_lookups_total', cache='page', outcome='hit')
+            self.cache.mark_used(url)
+            return entry['content']
         
-        # Extract novel ID from URL
-        novel_id = url.rstrip('/').split('/')[-1].replace('.html', '')
+        headers = self.cache.conditional_headers(entry) if entry else {}
+        with self.host_limiter.limit(url):
+            with self.metrics.timer('fetch', page_type=page_type):
+                response = self.session.get(url, headers=headers, timeout=30)
+        self.metrics.request(urlparse(url).netloc, response.status_code, received=len(response.content))
         
-        # Extract metadata
-        novel_data = {
-            'title': '',
-            'author': '',
-            'description': '',
-            'cover_url': '',
-            'type': '',
-            'status': '',
-            'last_updated': '',
-            'latest_chapter': '',
-            'chapters': []
-        }
+        if not self.cache:
+            return response.content
+        if entry and response.status_code == 304:
+            self.cache.record('revalidated')
+            self.metrics.inc('cache_lookups_total', cache='page', outcome='revalidated')
+            self.cache.touch(url)
+            return entry['content']
         
-        # Find book intro section
-        book_intro = soup.find('div', class_='book-intro')
-        if book_intro:
-            # Title
-            h1 = book_intro.find('h1')
-            if h1:
-                novel_data['title'] = h1.get_text(strip=True)
-            
-            # Cover image
-            img = book_intro.find('img', class_='lazy')
-            if img:
-                novel_data['cover_url'] = img.get('data-original', img.get('src', ''))
-            
-            # Extract metadata from paragraphs
-            book_describe = book_intro.find('div', class_='book-describe')
-            if book_describe:
-                paragraphs = book_describe.find_all('p')
-                for p in paragraphs:
-                    text = p.get_text(strip=True)
-                    if text.startswith('作者'):
-                        author_link = p.find('a')
-                        if author_link:
-                            novel_data['author'] = author_link.get_text(strip=True)
-                    elif text.startswith('類型'):
-                        novel_data['type'] = text.replace('類型︰', '').strip()
-                    elif text.startswith('狀態'):
-                        novel_data['status'] = text.replace('狀態︰', '').strip()
-                    elif text.startswith('最近更新'):
-                        novel_data['last_updated'] = text.replace('最近更新︰', '').strip()
-                    elif text.startswith('最新章節'):
-                        latest_link = p.find('a')
-                        if latest_link:
-                            novel_data['latest_chapter'] = latest_link.get_text(strip=True)
-                
-                # Description - preserve HTML formatting
-                describe_html = book_describe.find('div', class_='describe-html')
-                if describe_html:
-                    # Get HTML content with preserved tags
-                    desc_html = str(describe_html)
-                    # Clean up extra whitespace but keep <br> and <p> tags
-                    import re
-                    desc_html = re.sub(r'>\s+<', '><', desc_html)
-                    novel_data['description'] = desc_html
-        
-        # Extract chapters from book-list section
-        book_list = soup.find('div', class_='book-list')
-        if book_list:
-            chapter_links = book_list.find_all('a')
-            for link in chapter_links:
-                chapter_url = urljoin(url, link.get('href', ''))
-                chapter_title = link.get('title', link.get_text(strip=True))
-                
-                # Only include if it's a valid chapter URL
-                if '/books/' in chapter_url and chapter_url != url:
-                    novel_data['chapters'].append({
-                        'title': chapter_title,
-                        'url': chapter_url
-                    })
-        
-        return novel_data, novel_id
+        self.cache.record('misses')
+        self.metrics.inc('cache_lookups_total', cache='page', outcome='miss')
+        if response.status_code == 200:
+            self.cache.put(url, page_type, response.content,
+                           etag=response.headers.get('ETag'),
+                           last_modified=response.headers.get('Last-Modified'))
+        return response.content
+    
+    def parse_novel_page(self, url):
+        """Parse novel page to extract metadata and chapter list"""
+        content = self._get(url, 'novel')
+        with self.metrics.timer('parse', page_type='novel'):
+            return parse_novel_html(content, url)
     
     def parse_category_page(self, url):
         """Parse category page to extract novel URLs"""
-        response = self.session.get(url)
-        response.encoding = 'utf-8'
-        soup = BeautifulSoup(response.content, 'lxml')
-        
-        novels = []
-        
-        # Find all novel links in pop-books2 section
-        pop_books = soup.find('div', class_='pop-books2')
-        if pop_books:
-            novel_items = pop_books.find_all('li', class_='pop-book2')
-            for item in novel_items:
-                link = item.find('a', href=True)
-                if link and '/books/' in link['href']:
-                    novels.append(urljoin(url, link['href']))
-        
-        # Extract pagination info from pagelink div
-        pagination = {'current': 1, 'total': 1, 'next': None}
-        pagelink = soup.find('div', class_='pagelink')
-        if pagelink:
-            # Get current and total pages from pagestats
-            pagestats = pagelink.find('em', id='pagestats')
-            if pagestats:
-                stats_text = pagestats.get_text()
-                if '/' in stats_text:
-                    current, total = stats_text.split('/')
-                    pagination['current'] = int(current)
-                    pagination['total'] = int(total)
-            
-            # Get next page URL from next link
-            next_link = pagelink.find('a', class_='next')
-            if next_link:
-                pagination['next'] = urljoin(url, next_link['href'])
-        
-        return novels, pagination
+        listing, pagination = self.parse_category_listing(url)
+        return [entry['url'] for entry in listing], pagination
+    
+    def parse_category_listing(self, url):
+        """
+        Parse category page to extract novel URLs plus the update markers shown
+        in the listing (latest chapter, last update date) when the page has them.
+        Markers are '' when absent.
+        """
+        content = self._get(url, 'category')
+        with self.metrics.timer('parse', page_type='category'):
+            return parse_category_html(content, url)
     
     def parse_chapter_page(self, url):
         """Parse chapter page to extract content"""
-        response = self.session.get(url)
-        response.encoding = 'utf-8'
-        soup = BeautifulSoup(response.content, 'lxml')
-        
-        # Extract chapter title
-        title_elem = soup.find('h1', id='nr_title')
-        title = title_elem.get_text(strip=True) if title_elem else ''
-        
-        # Extract chapter content from div#nr1
-        content_elem = soup.find('div', id='nr1')
-        if not content_elem:
-            return None, None
-        
-        # Remove script tags and other unwanted elements
-        for tag in content_elem.find_all(['script', 'style']):
-            tag.decompose()
+        page = self._get(url, 'chapter')
+        with self.metrics.timer('parse', page_type='chapter'):
+            return parse_chapter_html(page)
+
+
+def _text_nodes(element):
+    """Stripped, non-empty text of element, as BeautifulSoup's get_text(strip=True) sees it"""
+    return [text.strip() for text in TEXT_XPATH(element) if text.strip()]
+
+
+def parse_chapter_html(page):
+    """
+    Extract (title, content) from a chapter page.
+    Fast path: lxml tree + precompiled XPath instead of a full BeautifulSoup
+    tree, with output identical to the BeautifulSoup version. Bytes are
+    decoded with the encoding BeautifulSoup would pick first.
+    """
+    if isinstance(page, bytes):
+        encoding = next(iter(EncodingDetector(page, is_html=True).encodings), None)
+        root = lxml_html.document_fromstring(page, parser=lxml_html.HTMLParser(encoding=encoding))
+    else:
+        root = lxml_html.document_fromstring(page)
+    
+    # Extract chapter title
+    title_elems = CHAPTER_TITLE_XPATH(root)
+    title = ''.join(_text_nodes(title_elems[0])) if title_elems else ''
+    
+    # Extract chapter content from div#nr1 (script/style text is skipped)
+    content_elems = CHAPTER_CONTENT_XPATH(root)
+    if not content_elems:
+        return None, None
+    
+    # Clean up the content
+    lines = [line.strip() for line in '\n'.join(_text_nodes(content_elems[0])).split('\n') if line.strip()]
+    # Remove common footer text
+    lines = [line for line in lines if '本站無彈出廣告' not in line]
+    content = '\n\n'.join(lines)
+    
+    return title, content
+
+
+def parse_novel_html(content, url):
+    """Extract (novel_data, novel_id) from a novel page"""
+    soup = BeautifulSoup(content, 'lxml', parse_only=NOVEL_PAGE_STRAINER)
+    
+    # Extract novel ID from URL
+    novel_id = url.rstrip('/').split('/')[-1].replace('.html', '')
+    
+    # Extract metadata
+    novel_data = {
+        'title': '',
+        'author': '',
+        'description': '',
+        'cover_url': '',
+        'type': '',
+        'status': '',
+        'last_updated': '',
+        'latest_chapter': '',
+        'chapters': []
+    }
+    
+    # Find book intro section
+    book_intro = soup.find('div', class_='book-intro')
+    if book_intro:
+        # Title
+        h1 = book_intro.find('h1')
+        if h1:
+            novel_data['title'] = h1.get_text(strip=True)
         
-        # Get the text content
-        content = content_elem.get_text(separator='\n', strip=True)
+        # Cover image
+        img = book_intro.find('img', class_='lazy')
+        if img:
+            novel_data['cover_url'] = img.get('data-original', img.get('src', ''))
         
-        # Clean up the content
-        lines = [line.strip() for line in content.split('\n') if line.strip()]
-        # Remove common footer text
-        lines = [line for line in lines if '本站無彈出廣告' not in line]
-        content = '\n\n'.join(lines)
+        # Extract metadata from paragraphs
+        book_describe = book_intro.find('div', class_='book-describe')
+        if book_describe:
+            paragraphs = book_describe.find_all('p')
+            for p in paragraphs:
+                text = p.get_text(strip=True)
+                if text.startswith('作者'):
+                    author_link = p.find('a')
+                    if author_link:
+                        novel_data['author'] = author_link.get_text(strip=True)
+                elif text.startswith('類型'):
+                    novel_data['type'] = text.replace('類型︰', '').strip()
+                elif text.startswith('狀態'):
+                    novel_data['status'] = text.replace('狀態︰', '').strip()
+                elif text.startswith('最近更新'):
+                    novel_data['last_updated'] = text.replace('最近更新︰', '').strip()
+                elif text.startswith('最新章節'):
+                    latest_link = p.find('a')
+                    if latest_link:
+                        novel_data['latest_chapter'] = latest_link.get_text(strip=True)
+            
+            # Description - preserve HTML formatting
+            describe_html = book_describe.find('div', class_='describe-html')
+            if describe_html:
+                # Get HTML content with preserved tags
+                desc_html = str(describe_html)
+                # Clean up extra whitespace but keep <br> and <p> tags
+                desc_html = re.sub(r'>\s+<', '><', desc_html)
+                novel_data['description'] = desc_html
+    
+    # Extract chapters from book-list section
+    book_list = soup.find('div', class_='book-list')
+    if book_list:
+        chapter_links = book_list.find_all('a')
+        for link in chapter_links:
+            chapter_url = urljoin(url, link.get('href', ''))
+            chapter_title = link.get('title', link.get_text(strip=True))
+            
+            # Only include if it's a valid chapter URL
+            if '/books/' in chapter_url and chapter_url != url:
+                novel_data['chapters'].append({
+                    'title': chapter_title,
+                    'url': chapter_url
+                })
+    
+    return novel_data, novel_id
+
+
+def parse_category_html(content, url):
+    """Extract (listing, pagination) from a category page"""
+    soup = BeautifulSoup(content, 'lxml', parse_only=CATEGORY_PAGE_STRAINER)
+    
+    novels = []
+    
+    # Find all novel links in pop-books2 section
+    pop_books = soup.find('div', class_='pop-books2')
+    if pop_books:
+        novel_items = pop_books.find_all('li', class_='pop-book2')
+        for item in novel_items:
+            link = item.find('a', href=True)
+            if link and '/books/' in link['href']:
+                novel_url = urljoin(url, link['href'])
+                novels.append({
+                    'url': novel_url,
+                    **_listing_markers(item, novel_url)
+                })
+    
+    # Extract pagination info from pagelink div
+    pagination = {'current': 1, 'total': 1, 'next': None}
+    pagelink = soup.find('div', class_='pagelink')
+    if pagelink:
+        # Get current and total pages from pagestats
+        pagestats = pagelink.find('em', id='pagestats')
+        if pagestats:
+            stats_text = pagestats.get_text()
+            if '/' in stats_text:
+                current, total = stats_text.split('/')
+                pagination['current'] = int(current)
+                pagination['total'] = int(total)
         
-        return title, content
+        # Get next page URL from next link
+        next_link = pagelink.find('a', class_='next')
+        if next_link:
+            pagination['next'] = urljoin(url, next_link['href'])
+    
+    return novels, pagination
+
+
+def _listing_markers(item, novel_url):
+    """Latest chapter / update date from one category listing item"""
+    markers = {'latest_chapter': '', 'last_updated': ''}
+    
+    # Latest chapter: a link into the novel's own chapter pages (/books/<id>/...)
+    book_prefix = novel_url[:-len('.html')] + '/' if novel_url.endswith('.html') else novel_url.rstrip('/') + '/'
+    for link in item.find_all('a', href=True):
+        if urljoin(novel_url, link['href']).startswith(book_prefix):
+            markers['latest_chapter'] = link.get_text(strip=True)
+            break
+    
+    # Last update: first date-looking text in the item
+    date_match = DATE_PATTERN.search(item.get_text(' ', strip=True))
+    if date_match:
+        markers['last_updated'] = date_match.group(0)
+    
+    return markers
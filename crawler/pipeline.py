@@ -0,0 +1,214 @@
+"""
+Streaming stages for the crawl -> translate -> upload pipeline
+"""
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+class AdaptiveBatchSizer:
+    """
+    Sizes bulk upload batches by serialized payload bytes instead of a fixed count.
+    The byte target grows while bulk requests finish well within target_seconds
+    and shrinks when they are slow or fail, so batches follow what the server
+    and the link can take. Thread-safe (shared by all novel workers).
+    """
+
+    def __init__(self, target_bytes=1024 * 1024, min_bytes=64 * 1024, max_bytes=8 * 1024 * 1024,
+                 max_chapters=50, target_seconds=30.0, grow=1.25):
+        self.min_bytes = min_bytes
+        self.max_bytes = max(min_bytes, max_bytes)
+        self.target_bytes = min(max(target_bytes, min_bytes), self.max_bytes)
+        self.max_chapters = max(1, max_chapters)
+        self.target_seconds = target_seconds
+        self.grow = grow
+        self.stats = {'batches': 0, 'failures': 0, 'slow': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def payload_size(chapter_data):
+        """Bytes chapter_data adds to a bulk request body (requests serializes json= the same way)"""
+        return len(json.dumps(chapter_data)) + 2
+
+    def fits(self, batch_bytes, batch_length, size):
+        """True if a chapter of `size` bytes can join a batch (a batch always takes its first chapter)"""
+        if not batch_length:
+            return True
+        with self._lock:
+            return batch_length < self.max_chapters and batch_bytes + size <= self.target_bytes
+
+    def record(self, payload_bytes, seconds, ok):
+        """Adjust the byte target from one bulk request's outcome"""
+        with self._lock:
+            self.stats['batches'] += 1
+            if not ok:
+                self.stats['failures'] += 1
+                self.target_bytes = max(self.min_bytes, self.target_bytes // 2)
+            elif seconds > self.target_seconds:
+                # Scale down to what fits in target_seconds at the observed throughput
+                self.stats['slow'] += 1
+                self.target_bytes = max(self.min_bytes, int(payload_bytes * self.target_seconds / seconds))
+            elif seconds < self.target_seconds / 2 and payload_bytes >= self.target_bytes * 0.75:
+                # Only batches that were actually near the target say anything about a larger one
+                self.target_bytes = min(self.max_bytes, int(self.target_bytes * self.grow))
+
+
+class ChapterUploader:
+    """
+    Background upload stage fed through a bounded queue.
+    Chapters are uploaded in batches of batch_size (or, with a sizer, batches
+    cut at its byte target) as soon as a batch fills, so WordPress uploads
+    overlap with crawling and translation.
+    CRITICAL: Chapters must be submitted in chapter_number order - batches
+    are uploaded one at a time in submission order.
+    """
+
+    _DONE = object()
+
+    def __init__(self, upload_batch, batch_size, delay=0, queue_size=None, sizer=None):
+        """
+        upload_batch(batch) must upload a list of chapter dicts and
+        return a (created, existed) tuple.
+        sizer: optional AdaptiveBatchSizer
+        """
+        self.upload_batch = upload_batch
+        self.batch_size = max(1, batch_size)
+        self.sizer = sizer
+        self.delay = delay
+        # Bounded queue keeps memory flat: the producer blocks when uploads fall behind
+        self.queue = queue.Queue(maxsize=queue_size or self.batch_size * 2)
+        self.created = 0
+        self.existed = 0
+        self.batches_uploaded = 0
+        self.error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='chapter-uploader', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, chapter_data):
+        """Queue a prepared chapter for upload (blocks while the queue is full)"""
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                self.queue.put(chapter_data, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        """Flush the last partial batch, wait for uploads and return (created, existed)"""
+        if not self._closed:
+            self._closed = True
+            if self._thread.is_alive():
+                while self.error is None:
+                    try:
+                        self.queue.put(self._DONE, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+                self._thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.created, self.existed
+
+    def _run(self):
+        batch = []
+        batch_bytes = 0
+        try:
+            while True:
+                item = self.queue.get()
+                if item is self._DONE:
+                    break
+                if self.sizer:
+                    size = self.sizer.payload_size(item)
+                    if not self.sizer.fits(batch_bytes, len(batch), size):
+                        self._flush(batch)
+                        batch, batch_bytes = [], 0
+                    batch_bytes += size
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch, batch_bytes = [], 0
+            if batch:
+                self._flush(batch)
+        except Exception as e:
+            self.error = e
+
+    def _flush(self, batch):
+        # Delay between batches (not before the first one)
+        if self.batches_uploaded and self.delay:
+            time.sleep(self.delay)
+        created, existed = self.upload_batch(batch)
+        self.created += created
+        self.existed += existed
+        self.batches_uploaded += 1
+
+
+class CoverPrefetcher:
+    """
+    Downloads novel covers on a small background pool so crawl_novel never
+    waits on images. download(novel_id, cover_url, session=...) returns
+    (filename, downloaded) like FileManager.download_cover; failures are
+    logged and counted, never raised.
+    """
+
+    def __init__(self, download, logger, workers=2, session=None, host_limiter=None, metrics=None):
+        self.download = download
+        self.session = session
+        self.host_limiter = host_limiter
+        self.metrics = metrics
+        self.logger = logger
+        self.stats = {'downloaded': 0, 'unchanged': 0, 'failed': 0}
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix='cover')
+
+    def submit(self, novel_id, cover_url):
+        """Queue a cover download (once per novel while one is in flight); returns its future"""
+        with self._lock:
+            future = self._futures.get(novel_id)
+            if future is None or future.done():
+                future = self._futures[novel_id] = self._executor.submit(self._fetch, novel_id, cover_url)
+            return future
+
+    def _fetch(self, novel_id, cover_url):
+        host = urlparse(cover_url).netloc
+        try:
+            start = time.perf_counter()
+            if self.host_limiter:
+                with self.host_limiter.limit(cover_url):
+                    filename, downloaded = self.download(novel_id, cover_url, session=self.session)
+            else:
+                filename, downloaded = self.download(novel_id, cover_url, session=self.session)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            self._count('failed')
+            if self.metrics:
+                self.metrics.request(host, 'error')
+            self.logger(f"  Failed to download cover for novel {novel_id}: {e}", 'warning', novel_id=novel_id)
+            return None
+
+        self._count('downloaded' if downloaded else 'unchanged')
+        if self.metrics:
+            self.metrics.observe('stage_seconds', elapsed, stage='download_cover')
+            self.metrics.request(host, 200 if downloaded else 304)
+            self.metrics.inc('cache_lookups_total', cache='cover', outcome='miss' if downloaded else 'revalidated')
+        self.logger(f"  Cover {'downloaded' if downloaded else 'unchanged (not modified)'}: {filename}",
+                    'debug', novel_id=novel_id)
+        return filename
+
+    def _count(self, outcome):
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def close(self, wait=True):
+        """Finish queued downloads (wait=True) and stop the pool"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,186 @@
+"""
+Opt-in profiling for crawler runs (--profile)
+
+Wraps a run in cProfile (every thread), tracemalloc (top allocations per
+crawl phase) and a stack sampler whose output is in the collapsed-stack
+format flamegraph.pl / speedscope read.
+"""
+
+import cProfile
+import io
+import linecache
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+
+class Profiler:
+    """
+    Usage:
+        profiler = Profiler('profile').start()
+        token = profiler.start_phase('crawl_translate')
+        ...
+        profiler.end_phase(token)
+        profiler.stop()   # writes the reports into output_dir
+    """
+
+    def __init__(self, output_dir='profile', top=25, sample_interval=0.005, traceback_frames=1, logger=print):
+        self.output_dir = output_dir
+        self.top = top
+        self.sample_interval = sample_interval
+        self.traceback_frames = traceback_frames
+        self.logger = logger
+        self._profiles = []
+        self._lock = threading.Lock()
+        # Allocation growth per phase: {phase: {(filename, lineno): [size_diff, count_diff]}}
+        self._phase_allocations = {}
+        self._phase_counts = Counter()
+        self._stacks = Counter()
+        self._sampling = threading.Event()
+        self._sampler = None
+        self.stats = None
+        self.started = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        os.makedirs(self.output_dir, exist_ok=True)
+        tracemalloc.start(self.traceback_frames)
+
+        # Started first so the sampler itself is not profiled
+        self._sampler = threading.Thread(target=self._sample, name='profile-sampler', daemon=True)
+        self._sampler.start()
+
+        # cProfile only sees the thread that enabled it - threads started from
+        # now on (fetch workers, uploader, translator pool) get their own profile
+        threading.setprofile(self._profile_thread)
+        main_profile = cProfile.Profile()
+        self._profiles.append(main_profile)
+        main_profile.enable()
+        return self
+
+    def _profile_thread(self, frame, event, arg):
+        """threading.setprofile hook: runs once in each new thread"""
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def _sample(self):
+        """Record the Python stack of every thread each sample_interval"""
+        own_id = threading.get_ident()
+        names = {}
+        while not self._sampling.wait(self.sample_interval):
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                # Pool threads are numbered (ThreadPoolExecutor-0_3); group them by pool
+                thread_name = names.get(thread_id, 'thread').rsplit('_', 1)[0]
+                stack.append(thread_name)
+                self._stacks[';'.join(reversed(stack))] += 1
+
+    def start_phase(self, name):
+        """Begin a phase; returns a token for end_phase"""
+        return name, tracemalloc.take_snapshot()
+
+    def end_phase(self, token):
+        """Add the allocation growth since start_phase to the phase's totals"""
+        name, before = token
+        after = tracemalloc.take_snapshot()
+        differences = after.compare_to(before, 'lineno')
+        with self._lock:
+            totals = self._phase_allocations.setdefault(name, {})
+            for stat in differences:
+                frame = stat.traceback[0]
+                # The profiler's own bookkeeping is not part of any phase
+                if frame.filename in (__file__, tracemalloc.__file__):
+                    continue
+                entry = totals.setdefault((frame.filename, frame.lineno), [0, 0])
+                entry[0] += stat.size_diff
+                entry[1] += stat.count_diff
+            self._phase_counts[name] += 1
+
+    def stop(self):
+        """Stop profiling and write the reports. Returns the written paths"""
+        threading.setprofile(None)
+        self._sampling.set()
+        self._sampler.join()
+
+        paths = []
+        paths.append(self._write_pstats())
+        paths.append(self._write_top_functions())
+        paths.extend(self._write_allocations())
+        paths.append(self._write_collapsed())
+        tracemalloc.stop()
+
+        self.logger(f"\nProfile written to {self.output_dir}/ ({time.perf_counter() - self.started:.1f}s profiled):")
+        for path in paths:
+            self.logger(f"  {path}")
+        return paths
+
+    def _stats(self):
+        with self._lock:
+            profiles = list(self._profiles)
+        for profile in profiles:
+            profile.disable()
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            try:
+                stats.add(profile)
+            except TypeError:
+                # Thread never made a profiled call
+                continue
+        return stats
+
+    def _write_pstats(self):
+        path = os.path.join(self.output_dir, 'profile.pstats')
+        self.stats = self._stats()
+        self.stats.dump_stats(path)
+        return path
+
+    def _write_top_functions(self):
+        """Readable top-N by cumulative and by own time"""
+        path = os.path.join(self.output_dir, 'profile_top.txt')
+        output = io.StringIO()
+        self.stats.stream = output
+        self.stats.sort_stats('cumulative').print_stats(self.top)
+        self.stats.sort_stats('tottime').print_stats(self.top)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(output.getvalue())
+        return path
+
+    def _write_allocations(self):
+        """One top-N allocation report per phase"""
+        paths = []
+        for name, totals in self._phase_allocations.items():
+            path = os.path.join(self.output_dir, f'allocations_{name}.txt')
+            ranked = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)[:self.top]
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"Top {self.top} allocation growth in phase '{name}' "
+                        f"(summed over {self._phase_counts[name]} occurrence(s))\n\n")
+                for rank, ((filename, lineno), (size, count)) in enumerate(ranked, start=1):
+                    f.write(f"#{rank}: {filename}:{lineno}: {size / 1024:+.1f} KiB in {count:+d} blocks\n")
+                    line = linecache.getline(filename, lineno).strip()
+                    if line:
+                        f.write(f"    {line}\n")
+            paths.append(path)
+        return paths
+
+    def _write_collapsed(self):
+        """Sampled stacks as 'thread;frame;frame count' lines (flamegraph.pl input)"""
+        path = os.path.join(self.output_dir, 'stacks.collapsed')
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self._stacks.items()):
+                f.write(f"{stack} {count}\n")
+        return path
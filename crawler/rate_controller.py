@@ -0,0 +1,79 @@
+"""
+Adaptive request rate control for external services
+"""
+
+import threading
+import time
+
+
+class RateController:
+    """
+    Token bucket whose rate adapts AIMD-style (additive increase, multiplicative
+    decrease): every success adds `increase` requests/second, every 429 or error
+    multiplies the rate by `decrease`. Throughput settles just under the real
+    provider limit instead of alternating between bursts and long stalls.
+    Until the first failure the controller is in slow start: every success
+    multiplies the rate by (1 + slow_start_growth), so a fresh run reaches
+    max_rate in about twenty requests instead of crawling up additively.
+    One controller is shared by every thread calling the service.
+    """
+
+    def __init__(self, rate=2.0, min_rate=0.05, max_rate=10.0, increase=0.05, decrease=0.5,
+                 slow_start_growth=0.1):
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_start_growth = slow_start_growth
+        self._slow_start = True
+        self._rate = min(max(rate, self.min_rate), self.max_rate)
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.stats = {'successes': 0, 'throttled': 0, 'errors': 0}
+
+    @property
+    def rate(self):
+        """Current allowed requests per second"""
+        return self._rate
+
+    def _refill(self, now):
+        # Bucket holds at most one second of requests, so bursts stay small
+        capacity = max(1.0, self._rate)
+        self._tokens = min(capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.stats['successes'] += 1
+            if self._slow_start:
+                self._rate = min(self.max_rate, self._rate * (1 + self.slow_start_growth))
+            else:
+                self._rate = min(self.max_rate, self._rate + self.increase)
+
+    def on_failure(self, throttled=False):
+        """Back off after a 429 (throttled=True) or any other error"""
+        with self._lock:
+            self.stats['throttled' if throttled else 'errors'] += 1
+            self._slow_start = False
+            now = time.monotonic()
+            # Requests already in flight fail together - count that as one signal
+            if now - self._last_decrease < 1.0 / self._rate:
+                return
+            self._last_decrease = now
+            self._refill(now)
+            self._rate = max(self.min_rate, self._rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
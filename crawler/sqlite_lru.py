@@ -0,0 +1,30 @@
+"""
+Least-recently-used eviction shared by the SQLite caches (http_cache, translation_memory)
+"""
+
+
+def evict_lru(conn, table, key_column, access_column, excess_bytes, batch=256):
+    """
+    Delete the least recently used rows of table until at least excess_bytes of
+    its `size` column are freed. Rows are read and deleted `batch` at a time
+    through the access_column index, so memory use does not grow with the table.
+    Returns (rows deleted, bytes freed). The caller holds its lock and commits.
+    """
+    deleted = freed = 0
+    while freed < excess_bytes:
+        sizes = [size for (size,) in conn.execute(
+            f'SELECT size FROM {table} ORDER BY {access_column} LIMIT ?', (batch,))]
+        if not sizes:
+            break
+        count = 0
+        for size in sizes:
+            count += 1
+            freed += size
+            if freed >= excess_bytes:
+                break
+        conn.execute(
+            f'DELETE FROM {table} WHERE {key_column} IN '
+            f'(SELECT {key_column} FROM {table} ORDER BY {access_column} LIMIT ?)', (count,)
+        )
+        deleted += count
+    return deleted, freed
@@ -0,0 +1,382 @@
+"""
+Crawler state backends (JSON file or SQLite)
+"""
+
+import os
+import copy
+import json
+import signal
+import sqlite3
+import threading
+
+
+# Novel progress fields stored as real columns; anything else goes in the extra JSON column
+NOVEL_FIELDS = ('status', 'chapters_crawled', 'chapters_total', 'story_id', 'last_updated')
+
+
+def empty_state():
+    return {'processed_novels': {}, 'last_category_page': None}
+
+
+class JsonStateStore:
+    """Legacy backend: the whole state lives in one JSON file"""
+
+    def __init__(self, path='crawler_state.json'):
+        self.path = path
+        self._lock = threading.RLock()
+        # State as last written (read from the file on the first flush)
+        self._state = None
+
+    def load(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        return empty_state()
+
+    def save(self, state):
+        """Write the state atomically (temp file + os.replace), so a crash never leaves a torn file"""
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def flush(self, novels, values):
+        """Write-behind flush: merge the dirty entries into the state and rewrite the file"""
+        with self._lock:
+            if self._state is None:
+                self._state = self.load()
+            self._state['processed_novels'].update(novels)
+            self._state.update(values)
+            self.save(self._state)
+
+    def get_novel(self, novel_url):
+        return self.load()['processed_novels'].get(novel_url)
+
+    def upsert_novel(self, novel_url, entry):
+        self.flush({novel_url: entry}, {})
+
+    def get_value(self, key, default=None):
+        return self.load().get(key, default)
+
+    def set_value(self, key, value):
+        self.flush({}, {key: value})
+
+    def close(self):
+        pass
+
+
+class SQLiteStateStore:
+    """
+    Transactional backend: one row per novel in an SQLite database (WAL mode).
+    Progress updates are single-row upserts instead of full-file rewrites, and
+    SQLite locking makes concurrent writers (threads, processes, Actions jobs) safe.
+    On first open, an existing crawler_state.json is migrated into the database.
+    """
+
+    def __init__(self, path='crawler_state.db', json_path='crawler_state.json', logger=None):
+        self.path = path
+        self.json_path = json_path
+        self.logger = logger
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._create_schema()
+        self._migrate_json()
+
+    def _connect(self):
+        """One connection per thread (sqlite3 connections are not shared across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: transactions are managed explicitly below
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _write(self, statements):
+        """Run (sql, params) statements in one write transaction"""
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers queue on busy_timeout
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for sql, params in statements:
+                conn.execute(sql, params)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _create_schema(self):
+        self._write([
+            ('''CREATE TABLE IF NOT EXISTS novels (
+                    url TEXT PRIMARY KEY,
+                    status TEXT,
+                    chapters_crawled INTEGER,
+                    chapters_total INTEGER,
+                    story_id INTEGER,
+                    last_updated TEXT,
+                    extra TEXT
+                )''', ()),
+            ('''CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )''', ()),
+        ])
+
+    def _migrate_json(self):
+        """One-time import of the legacy JSON state file"""
+        if self.get_value('_migrated_from_json') or not os.path.exists(self.json_path):
+            return
+        try:
+            with open(self.json_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            if self.logger:
+                self.logger(f"Warning: Could not migrate {self.json_path}: {e}")
+            return
+
+        statements = [self._novel_upsert(url, entry)
+                      for url, entry in legacy.get('processed_novels', {}).items()]
+        for key, value in legacy.items():
+            if key != 'processed_novels':
+                statements.append(self._meta_upsert(key, value))
+        statements.append(self._meta_upsert('_migrated_from_json', self.json_path))
+        self._write(statements)
+
+        if self.logger:
+            self.logger(f"Migrated {len(legacy.get('processed_novels', {}))} novels from {self.json_path} to {self.path}")
+
+    @staticmethod
+    def _novel_upsert(novel_url, entry):
+        extra = {k: v for k, v in entry.items() if k not in NOVEL_FIELDS}
+        return ('''INSERT INTO novels (url, status, chapters_crawled, chapters_total, story_id, last_updated, extra)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET
+                       status = excluded.status,
+                       chapters_crawled = excluded.chapters_crawled,
+                       chapters_total = excluded.chapters_total,
+                       story_id = excluded.story_id,
+                       last_updated = excluded.last_updated,
+                       extra = excluded.extra''',
+                (novel_url, entry.get('status'), entry.get('chapters_crawled'), entry.get('chapters_total'),
+                 entry.get('story_id'), entry.get('last_updated'),
+                 json.dumps(extra, ensure_ascii=False) if extra else None))
+
+    @staticmethod
+    def _meta_upsert(key, value):
+        return ('INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                (key, json.dumps(value, ensure_ascii=False)))
+
+    @staticmethod
+    def _row_to_entry(row):
+        entry = dict(zip(NOVEL_FIELDS, row[1:6]))
+        if row[6]:
+            entry.update(json.loads(row[6]))
+        return entry
+
+    def load(self):
+        """Build the full state dict (same shape as crawler_state.json)"""
+        conn = self._connect()
+        state = empty_state()
+        for row in conn.execute('SELECT url, ' + ', '.join(NOVEL_FIELDS) + ', extra FROM novels'):
+            state['processed_novels'][row[0]] = self._row_to_entry(row)
+        for key, value in conn.execute("SELECT key, value FROM meta WHERE key NOT LIKE '\\_%' ESCAPE '\\'"):
+            state[key] = json.loads(value)
+        return state
+
+    def get_novel(self, novel_url):
+        row = self._connect().execute(
+            'SELECT url, ' + ', '.join(NOVEL_FIELDS) + ', extra FROM novels WHERE url = ?', (novel_url,)
+        ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def upsert_novel(self, novel_url, entry):
+        self._write([self._novel_upsert(novel_url, entry)])
+
+    def flush(self, novels, values):
+        """Write-behind flush: upsert only the dirty rows ({url: entry}, {key: value}), in one transaction"""
+        statements = [self._novel_upsert(url, entry) for url, entry in novels.items()]
+        statements += [self._meta_upsert(key, value) for key, value in values.items()]
+        if statements:
+            self._write(statements)
+
+    def get_value(self, key, default=None):
+        row = self._connect().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_value(self, key, value):
+        self._write([self._meta_upsert(key, value)])
+
+    def close(self):
+        """Checkpoint the WAL into the main database file and close connections"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+class WriteBehindState:
+    """
+    Process-resident crawler state with coalesced write-behind flushing.
+    The state is loaded once; reads and updates only touch memory (microseconds),
+    and dirty entries are written to the backing store by a background thread
+    every flush_interval seconds, after flush_every updates, at exit and on SIGINT/SIGTERM.
+    Repeated updates to the same novel between flushes coalesce into one write.
+
+    Novel rows are re-read from the store unless this process has unflushed
+    changes to them, so a novel's progress written by another process (a
+    concurrent job) is seen at its next lookup. Writes are still whole-row
+    upserts: two processes crawling the same novel at once overwrite each
+    other's row (last flush wins). Other keys (chapter indexes, cover
+    validators) are read once per process.
+    """
+
+    def __init__(self, store, flush_interval=5.0, flush_every=50, logger=None):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.flush_every = max(1, flush_every)
+        self.logger = logger
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._state = store.load()
+        self._dirty_novels = set()
+        # Novels taken by a flush that is still writing them
+        self._flushing_novels = set()
+        self._dirty_keys = set()
+        self._pending_updates = 0
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._run_flusher, name='state-flusher', daemon=True)
+        self._flusher.start()
+        self._install_signal_handlers()
+
+    def get_novel(self, novel_url):
+        with self._lock:
+            # Pick up other processes' progress unless this process has unwritten changes to the row
+            # (dirty, or taken by a flush that has not committed yet)
+            if novel_url not in self._dirty_novels and novel_url not in self._flushing_novels:
+                stored = self.store.get_novel(novel_url)
+                if stored is not None:
+                    self._state['processed_novels'][novel_url] = stored
+            entry = self._state['processed_novels'].get(novel_url)
+            return dict(entry) if entry is not None else None
+
+    def upsert_novel(self, novel_url, entry):
+        with self._lock:
+            self._state['processed_novels'][novel_url] = dict(entry)
+            self._dirty_novels.add(novel_url)
+        self._mark_updated()
+
+    def get_value(self, key, default=None):
+        with self._lock:
+            return copy.deepcopy(self._state.get(key, default))
+
+    def set_value(self, key, value):
+        with self._lock:
+            self._state[key] = copy.deepcopy(value)
+            self._dirty_keys.add(key)
+        self._mark_updated()
+
+    def _mark_updated(self):
+        with self._lock:
+            self._pending_updates += 1
+            if self._pending_updates >= self.flush_every:
+                # Count threshold reached - let the flusher thread write it (caller never blocks on I/O)
+                self._wakeup.set()
+
+    def flush(self, blocking=True):
+        """
+        Write dirty entries to the backing store. With blocking=False, returns
+        False without flushing if another flush is in progress
+        """
+        if not self._flush_lock.acquire(blocking=blocking):
+            return False
+        try:
+            with self._lock:
+                if not (self._dirty_novels or self._dirty_keys):
+                    return True
+                dirty_novels, self._dirty_novels = self._dirty_novels, set()
+                dirty_keys, self._dirty_keys = self._dirty_keys, set()
+                # Copy only the dirty entries - flush cost follows the updates, not the state size
+                novels = {url: copy.deepcopy(self._state['processed_novels'][url]) for url in dirty_novels}
+                values = {key: copy.deepcopy(self._state.get(key)) for key in dirty_keys}
+                self._pending_updates = 0
+                self._flushing_novels = dirty_novels
+            try:
+                self.store.flush(novels, values)
+            except Exception:
+                # Keep the entries dirty so the next flush retries them
+                with self._lock:
+                    self._dirty_novels |= dirty_novels
+                    self._dirty_keys |= dirty_keys
+                raise
+            finally:
+                with self._lock:
+                    self._flushing_novels = set()
+            return True
+        finally:
+            self._flush_lock.release()
+
+    def _run_flusher(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                if self.logger:
+                    self.logger(f"Warning: Could not flush crawler state: {e}")
+
+    def _install_signal_handlers(self):
+        """Flush before the default SIGINT/SIGTERM handling (only possible from the main thread)"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for signum in (signal.SIGINT, getattr(signal, 'SIGTERM', None)):
+            if signum is None:
+                continue
+            previous = signal.getsignal(signum)
+
+            def handler(received, frame, previous=previous):
+                try:
+                    # The signal may interrupt a flush()/close() on this thread - never wait on
+                    # the flush lock; that flush (or close()'s final one) writes the entries
+                    self.flush(blocking=False)
+                except Exception:
+                    pass
+                if callable(previous):
+                    previous(received, frame)
+                elif previous == signal.SIG_IGN:
+                    return
+                else:
+                    raise SystemExit(128 + received)
+
+            signal.signal(signum, handler)
+
+    def close(self):
+        """Final flush and close the backing store"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self.flush()
+        self.store.close()
+
+
+def open_state_store(backend='sqlite', logger=None):
+    """Create the configured state backend ('sqlite' or 'json')"""
+    if backend == 'json':
+        return JsonStateStore('crawler_state.json')
+    return SQLiteStateStore('crawler_state.db', 'crawler_state.json', logger)
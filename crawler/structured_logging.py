@@ -0,0 +1,182 @@
+"""
+Queue-backed logging for the crawler
+
+Log calls only put a record on a queue; a background QueueListener thread
+formats and writes them to the console and to an optional JSON-lines file,
+so worker threads never block on console I/O.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+
+
+LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL,
+}
+
+# LogRecord attributes that are not caller-supplied fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def parse_level(level):
+    """logging level from a name ('info') or number"""
+    if isinstance(level, int):
+        return level
+    return LEVELS.get(str(level).lower(), logging.INFO)
+
+
+def record_fields(record):
+    """Caller-supplied fields (the extra= dict) of a record"""
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """Writes to the current sys.stdout; unencodable characters are replaced instead of raising"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    def emit(self, record):
+        self.stream = sys.stdout
+        try:
+            message = self.format(record)
+            try:
+                self.stream.write(message + self.terminator)
+            except UnicodeEncodeError:
+                self.stream.write(message.encode('ascii', 'replace').decode('ascii') + self.terminator)
+            self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Plain message; every line prefixed with the record's tag (e.g. the novel in worker mode)"""
+
+    def format(self, record):
+        message = record.getMessage()
+        if getattr(record, 'exception', None):
+            message += '\n' + record.exception
+        tag = getattr(record, 'tag', None)
+        if tag:
+            message = '\n'.join(f"[{tag}] {line}" if line else line for line in message.split('\n'))
+        if getattr(record, 'suppressed', 0):
+            message += f"  (+{record.suppressed} similar since last shown)"
+        return message
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, thread, message and the record's fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'thread': record.threadName,
+            'message': record.getMessage().strip('\n'),
+        }
+        for key, value in record_fields(record).items():
+            if key != 'suppressed':
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ExceptionQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps a record's traceback as its 'exception' field
+    (instead of folding it into the message), so the JSON log gets it as its own key
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            record.exception = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+            record.exc_text = None
+        return super().prepare(record)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most one record per `interval` seconds for each
+    (rate_limit, tag) key; records without a rate_limit field always pass.
+    The next record shown carries the number suppressed in between.
+    """
+
+    def __init__(self, interval):
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+
+    def filter(self, record):
+        kind = getattr(record, 'rate_limit', None)
+        if not kind or self.interval <= 0:
+            return True
+        key = (kind, getattr(record, 'tag', None))
+        now = record.created
+        if now - self._last.get(key, 0) < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+        self._last[key] = now
+        record.suppressed = self._suppressed.pop(key, 0)
+        return True
+
+
+class StructuredLogger:
+    """
+    Crawler logger: log(message, level='info', **fields).
+    Fields (chapter=12, novel_id='396941', ...) become JSON keys in the
+    JSON-lines file; the console shows only the message.
+    """
+
+    def __init__(self, name='crawler', level='info', console=True, json_path=None, json_level='debug',
+                 rate_limit_interval=5.0):
+        self._queue = queue.SimpleQueue()
+        handlers = []
+        if console:
+            console_handler = ConsoleHandler()
+            console_handler.setLevel(parse_level(level))
+            console_handler.setFormatter(ConsoleFormatter())
+            # Per-chapter messages are thinned out on the console only
+            console_handler.addFilter(RateLimitFilter(rate_limit_interval))
+            handlers.append(console_handler)
+        if json_path:
+            json_handler = logging.FileHandler(json_path, mode='w', encoding='utf-8')
+            json_handler.setLevel(parse_level(json_level))
+            json_handler.setFormatter(JsonFormatter())
+            handlers.append(json_handler)
+        self.handlers = handlers
+
+        # Own logger (not the root logger) so library logging is left alone
+        self.logger = logging.getLogger(f"{name}.{id(self)}")
+        self.logger.propagate = False
+        self.logger.setLevel(min([handler.level for handler in handlers] or [logging.CRITICAL]))
+        self.logger.addHandler(ExceptionQueueHandler(self._queue))
+
+        self._listener = logging.handlers.QueueListener(self._queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def log(self, message, level='info', exc_info=False, **fields):
+        """exc_info=True attaches the exception being handled (traceback in the 'exception' field)"""
+        self.logger.log(parse_level(level), message, exc_info=exc_info, extra=fields)
+
+    def close(self):
+        """Drain the queue and close the sinks"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._listener.stop()
+        for handler in self.handlers:
+            handler.close()
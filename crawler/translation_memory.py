@@ -0,0 +1,144 @@
+"""
+Persistent translation memory (SQLite)
+"""
+
+import atexit
+import hashlib
+import sqlite3
+import threading
+import time
+
+from sqlite_lru import evict_lru
+from translator import CJK_LANGUAGES, CJK_PATTERN, is_untranslated
+
+
+class TranslationMemory:
+    """
+    On-disk translation memory keyed by a hash of (source text, source lang, target lang).
+    Lookups happen before any network call and results are written back, so re-runs,
+    boilerplate lines and repeated phrases cost nothing. Least recently used entries
+    are evicted once the stored text exceeds max_bytes.
+
+    Pairs that were not actually translated (the source echoed back, or still
+    mostly CJK for a non-CJK target) are never stored, and such entries left
+    by older versions are deleted when they are read.
+    """
+
+    def __init__(self, path='translation_memory.db', max_bytes=500 * 1024 * 1024, untranslated_cjk_ratio=0.3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.untranslated_cjk_ratio = untranslated_cjk_ratio
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0, 'rejected': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                translation TEXT,
+                size INTEGER,
+                last_used REAL
+            )''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)')
+        self._conn.commit()
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM translations').fetchone()[0]
+        self._closed = False
+        atexit.register(self.close)
+
+    @staticmethod
+    def key(text, source, target):
+        return hashlib.sha256(f"{source}\x00{target}\x00{text}".encode('utf-8')).hexdigest()
+
+    def _untranslated(self, text, translation, target):
+        """True if translation is not a usable translation of text"""
+        if translation == text and CJK_PATTERN.search(text) and not target.lower().startswith(CJK_LANGUAGES):
+            return True
+        return is_untranslated(text, translation, target, self.untranslated_cjk_ratio)
+
+    def get_many(self, texts, source, target):
+        """Look up several texts at once. Returns {text: translation} for the hits"""
+        keys = {self.key(text, source, target): text for text in set(texts)}
+        found = {}
+        with self._lock:
+            key_list = list(keys)
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(key_list), 500):
+                batch = key_list[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                for key, translation in self._conn.execute(
+                        f'SELECT key, translation FROM translations WHERE key IN ({placeholders})', batch):
+                    found[keys[key]] = translation
+            stale = [text for text, translation in found.items() if self._untranslated(text, translation, target)]
+            if stale:
+                for text in stale:
+                    del found[text]
+                self._delete([self.key(text, source, target) for text in stale])
+            if found:
+                now = time.time()
+                self._conn.executemany('UPDATE translations SET last_used = ? WHERE key = ?',
+                                       [(now, self.key(text, source, target)) for text in found])
+            if found or stale:
+                self._conn.commit()
+            hits = sum(1 for text in texts if text in found)
+            self.stats['hits'] += hits
+            self.stats['misses'] += len(texts) - hits
+        return found
+
+    def get(self, text, source, target):
+        """Cached translation of text, or None"""
+        return self.get_many([text], source, target).get(text)
+
+    def put_many(self, pairs, source, target):
+        """Store (text, translation) pairs in one transaction"""
+        accepted = [(text, translation) for text, translation in pairs
+                    if not self._untranslated(text, translation, target)]
+        with self._lock:
+            self.stats['rejected'] += len(pairs) - len(accepted)
+        pairs = accepted
+        if not pairs:
+            return
+        now = time.time()
+        # One row per key (last translation wins) - a text repeated in the batch is stored and counted once
+        rows = {}
+        for text, translation in pairs:
+            key = self.key(text, source, target)
+            rows[key] = (key, translation, len(translation.encode('utf-8')), now)
+        rows = list(rows.values())
+        with self._lock:
+            for row in rows:
+                old = self._conn.execute('SELECT size FROM translations WHERE key = ?', (row[0],)).fetchone()
+                self._total_bytes += row[2] - (old[0] if old else 0)
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO translations (key, translation, size, last_used) VALUES (?, ?, ?, ?)', rows
+            )
+            self.stats['stored'] += len(rows)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def put(self, text, source, target, translation):
+        self.put_many([(text, translation)], source, target)
+
+    def _delete(self, keys):
+        """Delete entries by key (caller holds the lock and commits)"""
+        for key in keys:
+            old = self._conn.execute('SELECT size FROM translations WHERE key = ?', (key,)).fetchone()
+            if old:
+                self._conn.execute('DELETE FROM translations WHERE key = ?', (key,))
+                self._total_bytes -= old[0]
+
+    def _evict(self):
+        """Drop least recently used entries until back under 90% of max_bytes"""
+        evicted, freed = evict_lru(self._conn, 'translations', 'key', 'last_used',
+                                   self._total_bytes - self.max_bytes * 0.9)
+        self._total_bytes -= freed
+        self.stats['evicted'] += evicted
+
+    def close(self):
+        """Checkpoint the WAL into the database file and close it"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            self._conn.close()
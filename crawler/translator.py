@@ -8,16 +8,89 @@ try:
 except ImportError:
     GOOGLETRANS_AVAILABLE = False
 
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import chunker
+from concurrency import HostLimiter
+from metrics import Metrics
+from rate_controller import RateController
+
+
+# Placeholder for paragraphs whose translation was merged into a previous one
+_MERGED = object()
+
+
+# Target languages that are themselves written in CJK characters
+CJK_LANGUAGES = ('zh', 'ja', 'ko')
+
+CJK_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+class UntranslatedError(Exception):
+    """The translation service returned text that was not translated"""
+
+
+def cjk_ratio(text):
+    """Share of non-whitespace characters that are CJK ideographs"""
+    visible = len(WHITESPACE_PATTERN.sub('', text))
+    if not visible:
+        return 0.0
+    return len(CJK_PATTERN.findall(text)) / visible
+
+
+def is_untranslated(text, translated, target, max_cjk_ratio=0.3):
+    """True if translated is (mostly) the CJK source text rather than a translation into target"""
+    if target.lower().startswith(CJK_LANGUAGES):
+        return False
+    ratio = cjk_ratio(translated)
+    return ratio > max_cjk_ratio and ratio >= cjk_ratio(text) * 0.5
+
+
+def _is_throttled(error):
+    """True if a translation error means the provider is rate limiting us"""
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    message = str(error).lower()
+    return '429' in message or 'too many requests' in message
+
 
 class Translator:
-    def __init__(self, project_id, logger, credentials_file=None):
+    def __init__(self, project_id, logger, credentials_file=None, host_limiter=None, memory=None,
+                 max_in_flight=2, client_factory=None, rate_controller=None, max_attempts=8,
+                 untranslated_cjk_ratio=0.3, metrics=None):
         self.logger = logger
         self.client = None
         self.service = None
+        # Optional persistent translation memory (translation_memory.TranslationMemory)
+        self.memory = memory
+        self.stats = {'requests': 0, 'requests_saved': 0, 'untranslated': 0}
+        self._stats_lock = threading.Lock()
+        self.metrics = metrics or Metrics()
+        # Shared limiter caps concurrent translation requests across all novel workers
+        self.host_limiter = host_limiter or HostLimiter()
+        # Chunks of a batch are sent concurrently, at most max_in_flight at a time
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # OPTIMIZATION: Shared AIMD rate controller paces every translation request
+        self.rate_controller = rate_controller or RateController()
+        self.max_attempts = max(1, int(max_attempts))
+        # Responses with more CJK than this are treated as failed (source text echoed back)
+        self.untranslated_cjk_ratio = untranslated_cjk_ratio
+        # Each sending thread gets its own client (googletrans clients are not thread-safe)
+        self._client_factory = client_factory
+        self._local = threading.local()
         
-        if GOOGLETRANS_AVAILABLE:
+        if self._client_factory is None and GOOGLETRANS_AVAILABLE:
+            self._client_factory = GoogletransTranslator
+        
+        if self._client_factory is not None:
             try:
-                self.client = GoogletransTranslator()
+                self.client = self._client_factory()
                 self.service = 'googletrans'
                 self.logger("Using googletrans-py (free Google Translate API)")
                 return
@@ -29,53 +102,224 @@ class Translator:
         # No translator available
         self.client = None
     
-    def translate(self, text, source_lang='zh-CN', target_lang='en'):
-        """Translate text using googletrans"""
+    def translate_many(self, texts, source_lang='zh-CN', target_lang='en', strict=False):
+        """
+        Translate several independent texts (chapter titles, short chapters, metadata).
+        Their paragraphs are packed together into full-size requests instead of one
+        request per text. Returns the translations in the same order as texts.
+        With strict=True errors are raised instead of returning the original texts.
+        """
+        texts = list(texts)
         if not self.client:
+            if strict:
+                raise RuntimeError("No translator available")
             self.logger("Warning: No translator available")
-            return text
+            return texts
         
         try:
-            return self._translate_googletrans(text, source_lang, target_lang)
+            return self._translate_batch(texts, source_lang, target_lang)
         except Exception as e:
+            if strict:
+                raise
             self.logger(f"Translation error: {e}")
-            return text
+            return texts
     
-    def _translate_googletrans(self, text, source, target):
-        """Translate using googletrans with chunking for long texts"""
-        max_length = 4500  # Under 5000 limit
-        
+    def translate_chapter(self, title, content, source_lang='zh-CN', target_lang='en'):
+        """
+        Translate a chapter's title and content, raising on failure.
+        Failed chunks are retried on their own; chunks that succeed are stored in
+        the translation memory as they finish, so a rerun only resends what failed.
+        """
+        translated_title, translated_content = self.translate_many(
+            [title, content], source_lang, target_lang, strict=True
+        )
+        return translated_title, translated_content
+    
+    def _send(self, text, source, target):
+        """
+        Send one translation request while holding a translator request slot.
+        Pacing and retries are left to the shared rate controller: failures
+        shrink its rate, so a retry waits exactly as long as the provider needs.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            self.rate_controller.acquire()
+            try:
+                with self.host_limiter.limit('translator'):
+                    with self._stats_lock:
+                        self.stats['requests'] += 1
+                    try:
+                        with self.metrics.timer('translate_request'):
+                            result = self._thread_client().translate(text, src=source, dest=target)
+                    except Exception:
+                        self.metrics.request('translator', 'error', sent=len(text.encode('utf-8')))
+                        raise
+                    self.metrics.request('translator', 'ok', sent=len(text.encode('utf-8')),
+                                         received=len(result.text.encode('utf-8')))
+                if self._untranslated(text, result.text, target):
+                    with self._stats_lock:
+                        self.stats['untranslated'] += 1
+                    raise UntranslatedError(f"response still {cjk_ratio(result.text):.0%} CJK")
+            except Exception as e:
+                throttled = _is_throttled(e)
+                self.rate_controller.on_failure(throttled=throttled)
+                if attempt == self.max_attempts:
+                    raise
+                self.metrics.inc('retries_total', service='translator', reason=(
+                    'throttled' if throttled else 'untranslated' if isinstance(e, UntranslatedError) else 'error'
+                ))
+                reason = "rate limited (429)" if throttled else f"{type(e).__name__}: {e}"
+                self.logger(f"    Translation request failed ({reason}) - retry {attempt}/{self.max_attempts - 1} "
+                            f"at {self.rate_controller.rate:.2f} req/s", 'warning')
+                continue
+            self.rate_controller.on_success()
+            return result
+    
+    def _untranslated(self, text, translated, target):
+        """True if the provider returned (mostly) the source text"""
+        return is_untranslated(text, translated, target, self.untranslated_cjk_ratio)
+    
+    def _thread_client(self):
+        """Client owned by the calling thread"""
+        if threading.current_thread() is threading.main_thread() or self._client_factory is None:
+            return self.client
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._client_factory()
+            self._local.client = client
+        return client
+    
+    def _pool(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='translate')
+            return self._executor
+    
+    def _translate_batch(self, texts, source, target):
+        """
+        Translate texts by packing their paragraphs into as few requests as possible.
+        Paragraph breaks ('\n\n') delimit both paragraphs and texts; every response
+        is checked to contain exactly as many parts as were sent.
+        """
         # Map language codes
         source = source.replace('zh-CN', 'zh-cn')
         
-        if len(text) <= max_length:
-            result = self.client.translate(text, src=source, dest=target)
-            return result.text
+        paragraphs = {}
+        results = {}
+        for t, text in enumerate(texts):
+            for i, para in enumerate(text.split('\n\n')):
+                paragraphs[(t, i)] = para
+                if not para.strip():
+                    results[((t, i), 0)] = para
+        
+        # OPTIMIZATION: Translation memory lookup before any network call
+        if self.memory:
+            known = self.memory.get_many(
+                [para for unit, para in paragraphs.items() if (unit, 0) not in results], source, target
+            )
+            outcomes = {'hit': 0, 'miss': 0}
+            for unit, para in paragraphs.items():
+                if (unit, 0) not in results:
+                    outcomes['hit' if para in known else 'miss'] += 1
+                    if para in known:
+                        results[(unit, 0)] = known[para]
+            for outcome, count in outcomes.items():
+                self.metrics.inc('cache_lookups_total', count, cache='translation_memory', outcome=outcome)
+        
+        pending = [(unit, para) for unit, para in paragraphs.items() if (unit, 0) not in results]
+        chunks = chunker.pack(pending)
+        
+        # Requests these texts would have cost if each was translated on its own
+        unpacked = sum(
+            len(chunker.pack([(unit, para) for unit, para in pending if unit[0] == t]))
+            for t in {unit[0] for unit, _ in pending}
+        )
+        sent = [0]
+        
+        # OPTIMIZATION: Chunks go out concurrently; each writes only its own
+        # paragraphs, so reassembly below keeps the original order
+        if len(chunks) > 1 and self.max_in_flight > 1:
+            futures = [
+                self._pool().submit(self._translate_chunk, chunk, results, source, target, sent)
+                for chunk in chunks
+            ]
+            error = None
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    # Chunks already in flight still finish (and are checkpointed);
+                    # the ones not started yet are dropped
+                    if error is None:
+                        error = e
+                        for pending_future in futures:
+                            pending_future.cancel()
+            if error is not None:
+                raise error
         else:
-            # Split by paragraphs and group into chunks
-            paragraphs = text.split('\n\n')
-            translated_paragraphs = []
-            current_chunk = []
-            current_length = 0
-            
-            for para in paragraphs:
-                if current_length + len(para) > max_length and current_chunk:
-                    # Translate current chunk
-                    chunk_text = '\n\n'.join(current_chunk)
-                    result = self.client.translate(chunk_text, src=source, dest=target)
-                    translated_paragraphs.append(result.text)
-                    
-                    # Start new chunk
-                    current_chunk = [para]
-                    current_length = len(para)
+            for chunk in chunks:
+                self._translate_chunk(chunk, results, source, target, sent)
+        
+        saved = unpacked - sent[0]
+        if saved > 0:
+            with self._stats_lock:
+                self.stats['requests_saved'] += saved
+            if len(texts) > 1:
+                self.logger(f"    Packed {len(texts)} texts into {len(chunks)} translation request(s) (saved {saved})", 'debug')
+        
+        # Sentences of a split paragraph are rejoined without the paragraph break
+        sentence_joiner = '' if target.lower().startswith(CJK_LANGUAGES) else ' '
+        split_paragraphs = []
+        translations = []
+        for t, text in enumerate(texts):
+            parts = []
+            for i in range(text.count('\n\n') + 1):
+                pieces = []
+                while ((t, i), len(pieces)) in results:
+                    pieces.append(results[((t, i), len(pieces))])
+                kept = [piece for piece in pieces if piece is not _MERGED]
+                if kept:
+                    parts.append(sentence_joiner.join(kept))
+                if len(pieces) > 1 and len(kept) == len(pieces):
+                    split_paragraphs.append((paragraphs[(t, i)], parts[-1]))
+            translations.append('\n\n'.join(parts))
+        
+        if self.memory and split_paragraphs:
+            self.memory.put_many(split_paragraphs, source, target)
+        return translations
+    
+    def _translate_chunk(self, chunk, results, source, target, sent):
+        """Send one packed chunk and map the response back onto its paragraphs"""
+        chunk_texts = [text for _, _, text in chunk]
+        result = self._send(chunker.JOINER.join(chunk_texts), source, target)
+        with self._stats_lock:
+            sent[0] += 1
+        parts = result.text.split(chunker.JOINER)
+        
+        if len(parts) == len(chunk):
+            # The whole-chunk check in _send can pass with one paragraph echoed back;
+            # check every part and resend the untranslated ones on their own
+            translated = []
+            retry = []
+            for item, part in zip(chunk, parts):
+                if item[2].strip() and self._untranslated(item[2], part, target):
+                    retry.append(item)
                 else:
-                    current_chunk.append(para)
-                    current_length += len(para)
-            
-            # Translate remaining chunk
-            if current_chunk:
-                chunk_text = '\n\n'.join(current_chunk)
-                result = self.client.translate(chunk_text, src=source, dest=target)
-                translated_paragraphs.append(result.text)
-            
-            return '\n\n'.join(translated_paragraphs)
+                    results[(item[0], item[1])] = part
+                    translated.append((item[2], part))
+            if self.memory:
+                self.memory.put_many([(text, part) for text, part in translated if text.strip()], source, target)
+            if retry:
+                with self._stats_lock:
+                    self.stats['untranslated'] += len(retry)
+                for item in retry:
+                    self._translate_chunk([item], results, source, target, sent)
+        elif len({unit[0] for unit, _, _ in chunk}) > 1:
+            # Boundaries lost across texts - resend each text's share on its own
+            for t in sorted({unit[0] for unit, _, _ in chunk}):
+                self._translate_chunk([item for item in chunk if item[0][0] == t], results, source, target, sent)
+        else:
+            # Paragraph boundaries were not preserved - keep the chunk as one block
+            unit, piece, _ = chunk[0]
+            results[(unit, piece)] = result.text
+            for unit, piece, _ in chunk[1:]:
+                results[(unit, piece)] = _MERGED
@@ -2,16 +2,35 @@
 WordPress REST API client
 """
 
+import gzip
+import json
+import re
+import threading
+import time
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from urllib.parse import urlparse
+
+from concurrency import HostLimiter
+from metrics import Metrics
 
 
 class WordPressAPI:
-    def __init__(self, wordpress_url, api_key, logger):
+    def __init__(self, wordpress_url, api_key, logger, host_limiter=None, metrics=None,
+                 compress_requests=True, compress_min_bytes=1024):
         self.wordpress_url = wordpress_url
         self.api_key = api_key
         self.logger = logger
+        self.metrics = metrics or Metrics()
+        # OPTIMIZATION: gzip request bodies (bulk chapters, story) once /health advertises support
+        self.compress_requests = compress_requests
+        self.compress_min_bytes = compress_min_bytes
+        self.gzip_supported = False
+        self.compression_stats = {'requests': 0, 'raw_bytes': 0, 'sent_bytes': 0, 'seconds': 0.0, 'fallbacks': 0}
+        self._stats_lock = threading.Lock()
+        # Shared limiter caps concurrent requests to WordPress across all novel workers
+        self.host_limiter = host_limiter or HostLimiter()
         self._connection_tested = False  # Cache connection test result
         self._connection_ok = False
         
@@ -38,6 +57,72 @@ class WordPressAPI:
         # Set default headers
         self.session.headers.update({'X-API-Key': self.api_key})
     
+    def _request(self, method, endpoint, compress=False, **kwargs):
+        """
+        Send a request to a crawler/v1 endpoint while holding a WordPress request slot.
+        compress=True gzips a json= body when the server supports it.
+        """
+        if compress and self.gzip_supported and 'json' in kwargs:
+            raw = json.dumps(kwargs['json'], allow_nan=False).encode('utf-8')
+            if len(raw) >= self.compress_min_bytes:
+                return self._request_compressed(method, endpoint, raw, **kwargs)
+        return self._send(method, endpoint, **kwargs)
+    
+    def _request_compressed(self, method, endpoint, raw, **kwargs):
+        """
+        Send raw (serialized JSON) with Content-Encoding: gzip.
+        If the server rejects the encoding (400/415) and the same body succeeds as
+        plain JSON, compression is switched off for the rest of the run.
+        """
+        payload = kwargs.pop('json')
+        with self.metrics.timer('gzip_compress'):
+            body = gzip.compress(raw, compresslevel=6)
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers.update({'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+        
+        start = time.perf_counter()
+        response = self._send(method, endpoint, data=body, headers=headers, **kwargs)
+        elapsed = time.perf_counter() - start
+        
+        if response.status_code in (400, 415):
+            plain_response = self._send(method, endpoint, json=payload, **kwargs)
+            if plain_response.status_code < 400:
+                self.gzip_supported = False
+                with self._stats_lock:
+                    self.compression_stats['fallbacks'] += 1
+                self.metrics.inc('retries_total', service='wordpress', reason='gzip_fallback')
+                self.logger(f"  ⚠ WordPress rejected a gzip request body ({response.status_code}) - sending plain JSON from now on", 'warning')
+            return plain_response
+        
+        with self._stats_lock:
+            self.compression_stats['requests'] += 1
+            self.compression_stats['raw_bytes'] += len(raw)
+            self.compression_stats['sent_bytes'] += len(body)
+            self.compression_stats['seconds'] += elapsed
+        self.metrics.inc('bytes_saved_total', len(raw) - len(body), host=urlparse(self.wordpress_url).netloc)
+        return response
+    
+    def _send(self, method, endpoint, **kwargs):
+        url = f"{self.wordpress_url}/wp-json/crawler/v1/{endpoint}"
+        host = urlparse(url).netloc
+        # IDs are folded out so each endpoint gets one latency series
+        stage_endpoint = re.sub(r'/\d+', '/{id}', endpoint)
+        with self.host_limiter.limit(url):
+            try:
+                with self.metrics.timer('wordpress', endpoint=stage_endpoint):
+                    response = self.session.request(method, url, **kwargs)
+            except Exception:
+                self.metrics.request(host, 'error')
+                raise
+        
+        body = response.request.body or b''
+        self.metrics.request(host, response.status_code, sent=len(body), received=len(response.content))
+        # Retries made inside the urllib3 adapter (429/5xx)
+        retries = getattr(response.raw, 'retries', None)
+        if retries and retries.history:
+            self.metrics.inc('retries_total', len(retries.history), service='wordpress', reason='http_retry')
+        return response
+    
     def test_connection(self, force=False):
         """Test connection to WordPress API (cached after first success)"""
         # Use cached result unless force=True
@@ -45,14 +130,17 @@ class WordPressAPI:
             return self._connection_ok, {'cached': True}
         
         try:
-            response = self.session.get(
-                f"{self.wordpress_url}/wp-json/crawler/v1/health",
+            response = self._request(
+                'GET', "health",
                 timeout=10
             )
             if response.status_code == 200:
                 data = response.json()
                 self._connection_tested = True
                 self._connection_ok = True
+                # Capability flag from the plugin; servers without it get plain JSON
+                capabilities = data.get('capabilities') or {}
+                self.gzip_supported = self.compress_requests and bool(capabilities.get('gzip_requests'))
                 return True, data
             self._connection_tested = True
             self._connection_ok = False
@@ -64,9 +152,10 @@ class WordPressAPI:
     
     def create_story(self, story_data):
         """Create or get existing story in WordPress"""
-        response = self.session.post(
-            f"{self.wordpress_url}/wp-json/crawler/v1/story",
+        response = self._request(
+            'POST', "story",
             json=story_data,
+            compress=True,
             timeout=30
         )
         
@@ -82,8 +171,8 @@ class WordPressAPI:
     def get_story_chapter_status(self, story_id, total_chapters):
         """Get bulk status of all chapters for a story (FAST!)"""
         try:
-            response = self.session.get(
-                f"{self.wordpress_url}/wp-json/crawler/v1/story/{story_id}/chapters",
+            response = self._request(
+                'GET', f"story/{story_id}/chapters",
                 params={'total_chapters': total_chapters},
                 timeout=15
             )
@@ -106,8 +195,8 @@ class WordPressAPI:
     def check_chapter_exists(self, story_id, chapter_number):
         """Check if chapter already exists in WordPress"""
         try:
-            response = self.session.get(
-                f"{self.wordpress_url}/wp-json/crawler/v1/chapter/exists",
+            response = self._request(
+                'GET', "chapter/exists",
                 params={'story_id': story_id, 'chapter_number': chapter_number},
                 timeout=10
             )
@@ -127,8 +216,8 @@ class WordPressAPI:
     
     def create_chapter(self, chapter_data):
         """Create chapter in WordPress"""
-        response = self.session.post(
-            f"{self.wordpress_url}/wp-json/crawler/v1/chapter",
+        response = self._request(
+            'POST', "chapter",
             json=chapter_data,
             timeout=30
         )
@@ -145,9 +234,10 @@ class WordPressAPI:
     def create_chapters_bulk(self, chapters_data):
         """Create multiple chapters in a single API call (OPTIMIZATION)"""
         try:
-            response = self.session.post(
-                f"{self.wordpress_url}/wp-json/crawler/v1/chapters/bulk",
+            response = self._request(
+                'POST', "chapters/bulk",
                 json={'chapters': chapters_data},
+                compress=True,
                 timeout=180  # Longer timeout for bulk operations (increased from 120)
             )
             